@@ -1,9 +1,16 @@
 import os
+import importlib
 import logging
-from flask import Flask
+from flask import Flask, Blueprint
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from config import Config
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - fall back to stdlib json
+    orjson = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -11,44 +18,88 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# (module_path, blueprint_attr, url_prefix)
+BLUEPRINTS = [
+    ("routes.auth_routes", "auth_bp", "/api/auth"),
+    ("routes.repo_routes", "repo_bp", "/api/repos"),
+    ("routes.analysis_routes", "analysis_bp", "/api/analysis"),
+    ("routes.security_routes", "security_bp", "/api/security"),
+    ("routes.docs_routes", "docs_bp", "/api/docs"),
+    ("routes.diagram_routes", "diagram_bp", "/api/diagrams"),
+    ("routes.chat_routes", "chat_bp", "/api/chat"),
+    ("routes.analytics_routes", "analytics_bp", "/api/analytics"),
+    ("routes.faculty_routes", "faculty_bp", "/api/faculty"),
+    ("routes.hod_routes", "hod_bp", "/api/hod"),
+]
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson's C encoder.
+
+    Analysis results are large nested dicts (file lists, import graph,
+    folder tree); orjson encodes them several times faster than the
+    stdlib encoder Flask uses by default.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=str).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the Response instead of the
+        # default dumps→str→re-encode round trip; on the big list
+        # endpoints that second copy of the payload is pure overhead.
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=str), mimetype="application/json")
+
+
+class _LazyBlueprint(Blueprint):
+    """Blueprint proxy that defers the route-module import until registration.
+
+    Keeps create_app from eagerly importing every route module (and their
+    transitive deps) just to build the app object.
+    """
+
+    def __init__(self, import_path, attr):
+        super().__init__(attr, import_path)
+        self._import_path = import_path
+        self._attr = attr
+
+    def register(self, app, options):
+        module = importlib.import_module(self._import_path)
+        real_bp = getattr(module, self._attr)
+        real_bp.register(app, options)
+
 
 def create_app(config_class=Config):
     """Application factory."""
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+
     # CORS
     CORS(app, origins=config_class.CORS_ORIGINS, supports_credentials=True)
 
     # Ensure temp directory exists
     os.makedirs(app.config.get("UPLOAD_FOLDER", "temp_repos"), exist_ok=True)
 
-    # Initialize Firebase
-    from services.firebase_service import init_firebase
-    init_firebase(app)
-
-    # Register blueprints
-    from routes.auth_routes import auth_bp
-    from routes.repo_routes import repo_bp
-    from routes.analysis_routes import analysis_bp
-    from routes.security_routes import security_bp
-    from routes.docs_routes import docs_bp
-    from routes.diagram_routes import diagram_bp
-    from routes.chat_routes import chat_bp
-    from routes.analytics_routes import analytics_bp
-    from routes.faculty_routes import faculty_bp
-    from routes.hod_routes import hod_bp
-
-    app.register_blueprint(auth_bp, url_prefix="/api/auth")
-    app.register_blueprint(repo_bp, url_prefix="/api/repos")
-    app.register_blueprint(analysis_bp, url_prefix="/api/analysis")
-    app.register_blueprint(security_bp, url_prefix="/api/security")
-    app.register_blueprint(docs_bp, url_prefix="/api/docs")
-    app.register_blueprint(diagram_bp, url_prefix="/api/diagrams")
-    app.register_blueprint(chat_bp, url_prefix="/api/chat")
-    app.register_blueprint(analytics_bp, url_prefix="/api/analytics")
-    app.register_blueprint(faculty_bp, url_prefix="/api/faculty")
-    app.register_blueprint(hod_bp, url_prefix="/api/hod")
+    # Initialize Firebase lazily — credential parsing happens on first request
+    # instead of at import/fork time (Flask 3.x removed before_first_request).
+    @app.before_request
+    def _ensure_firebase():
+        if not app.config.get("_FIREBASE_READY"):
+            from services.firebase_service import init_firebase
+            init_firebase(app)
+            app.config["_FIREBASE_READY"] = True
+
+    # Register blueprints (imports deferred via _LazyBlueprint)
+    for module_path, attr, url_prefix in BLUEPRINTS:
+        app.register_blueprint(_LazyBlueprint(module_path, attr), url_prefix=url_prefix)
 
     # Health check
     @app.route("/api/health")
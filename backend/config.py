@@ -30,6 +30,9 @@ class Config:
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
     GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-pro")
 
+    # GitHub (optional token lifts the search quota from 60 to 5000/hour)
+    GITHUB_TOKEN = os.getenv("GITHUB_TOKEN", "")
+
     # Rate limiting
     RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", "30"))
 
@@ -14,9 +14,14 @@ NO ML TRAINING. Deterministic analysis only.
 import os
 import ast
 import re
+import sys
 import json
+import mmap
+import hashlib
 import logging
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -24,7 +29,9 @@ logger = logging.getLogger(__name__)
 # ---------------------------------------------------------------------------
 # File extension → language mapping
 # ---------------------------------------------------------------------------
-LANGUAGE_MAP = {
+# Values interned: "python"/"javascript"/... are stored once per file scanned,
+# so collapsing them to one object cuts memory and makes dict hashing cheaper.
+LANGUAGE_MAP = {ext: sys.intern(lang) for ext, lang in {
     ".py": "python",
     ".js": "javascript",
     ".jsx": "javascript",
@@ -51,7 +58,7 @@ LANGUAGE_MAP = {
     ".xml": "xml",
     ".md": "markdown",
     ".txt": "text",
-}
+}.items()}
 
 # Directories to always skip
 SKIP_DIRS = {
@@ -68,6 +75,32 @@ SKIP_FILES = {
 
 MAX_FILE_SIZE = 1 * 1024 * 1024  # 1 MB per file
 
+# Non-code formats: counted but not scanned by the code detectors
+NON_CODE_LANGS = frozenset({"json", "xml", "markdown", "text"})
+
+# Non-code files the framework detector still needs the contents of
+DEP_MANIFEST_FILES = frozenset({
+    "requirements.txt", "package.json", "composer.json", "pom.xml",
+})
+
+# Non-code files up to this size keep their contents anyway: the
+# tech-stack keyword sweep picks up stacks only mentioned in prose
+# (README.md and friends), so dropping all doc contents would lose those
+# detections. Bigger docs only contribute line counts.
+NON_CODE_KEEP_BYTES = 64 * 1024
+
+# Repo-level budget on content kept for scanning; files past it are still
+# counted but their contents are not fed to the detectors.
+SCAN_BYTE_BUDGET = 256 * 1024 * 1024  # 256 MB
+
+# Minified/generated artifacts: skip content, they only burn regex/AST time
+MINIFIED_SUFFIXES = (".min.js", ".min.css", ".bundle.js")
+MAX_AVG_LINE_LENGTH = 500
+
+# Files above this size are memory-mapped and regex-scanned as bytes
+# instead of being decoded into a Python str.
+MMAP_THRESHOLD = 128 * 1024
+
 
 class CodebaseAnalyzer:
     """Main analysis orchestrator."""
@@ -75,65 +108,372 @@ class CodebaseAnalyzer:
     def __init__(self, repo_path: str):
         self.repo_path = os.path.abspath(repo_path)
         self.files = []          # list of relative paths
-        self.file_contents = {}  # rel_path → content
+        self.file_contents = {}  # rel_path → content (str)
+        self.file_mmaps = {}     # rel_path → mmap for large files
         self.languages = defaultdict(int)  # language → line count
         self.total_files = 0
         self.total_lines = 0
+        self.ast_cache = {}      # rel_path → ast.Module (None if unparseable)
+        self._bytes_scanned = 0  # content bytes kept, against SCAN_BYTE_BUDGET
+        self._stat_sig = []      # (rel_path, size, mtime) for the cache key
 
     # ------------------------------------------------------------------
     # 1. Scan file tree
     # ------------------------------------------------------------------
+    def _walk(self, dir_path, candidates):
+        """Recursive scandir walk. Appends (abs_path, rel_path, lang) tuples.
+
+        Uses DirEntry's cached stat/type info so each file costs a single
+        syscall instead of the stat-per-call pattern of os.walk + getsize.
+        """
+        prefix = self.repo_path + os.sep
+        try:
+            entries = os.scandir(dir_path)
+        except OSError:
+            return
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SKIP_DIRS:
+                        self._walk(entry.path, candidates)
+                elif entry.is_file(follow_symlinks=False):
+                    if entry.name in SKIP_FILES:
+                        continue
+                    # Skip large files (DirEntry.stat is cached)
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    size = st.st_size
+                    if size > MAX_FILE_SIZE:
+                        continue
+                    _, dot, ext = entry.name.rpartition(".")
+                    lang = LANGUAGE_MAP.get("." + ext.lower()) if dot else None
+                    rel_path = sys.intern(
+                        entry.path.removeprefix(prefix).replace("\\", "/")
+                    )
+                    candidates.append((entry.path, rel_path, lang, size))
+                    self._stat_sig.append((rel_path, size, int(st.st_mtime)))
+
+    @staticmethod
+    def _count_lines_stream(abs_path):
+        """Count lines in 64 KiB chunks without holding the file in memory."""
+        total = 0
+        with open(abs_path, "rb") as f:
+            while True:
+                buf = f.read(65536)
+                if not buf:
+                    break
+                total += buf.count(b"\n")
+        return total + 1
+
+    @staticmethod
+    def _fast_read(abs_path, size):
+        """Read a whole file, sized from the already-known stat.
+
+        Small files bypass BufferedReader with a bare os.read; larger ones
+        use a 128 KiB buffer so fewer read() syscalls are issued.
+        """
+        if size < 65536:
+            fd = os.open(abs_path, os.O_RDONLY)
+            try:
+                return os.read(fd, size)
+            finally:
+                os.close(fd)
+        with open(abs_path, "rb", buffering=131072) as f:
+            return f.read()
+
+    @staticmethod
+    def _read_one(candidate):
+        """Worker: read one candidate file.
+
+        Returns (rel_path, lang, content, line_count); content is None for
+        large non-code files that only contribute line counts, which are
+        streamed chunk-wise instead of being read whole. Small non-code
+        files (manifests, READMEs under NON_CODE_KEEP_BYTES) keep their
+        contents for the keyword detectors.
+        """
+        abs_path, rel_path, lang, size = candidate
+        basename = rel_path.rpartition("/")[2]
+        try:
+            if (lang in NON_CODE_LANGS and basename not in DEP_MANIFEST_FILES
+                    and size > NON_CODE_KEEP_BYTES):
+                return rel_path, lang, None, CodebaseAnalyzer._count_lines_stream(abs_path)
+            if size > MMAP_THRESHOLD:
+                # Large file: map it read-only and scan as bytes later —
+                # no str copy, the OS pages in only what regex touches
+                fd = os.open(abs_path, os.O_RDONLY)
+                try:
+                    mm = mmap.mmap(fd, size, access=mmap.ACCESS_READ)
+                finally:
+                    os.close(fd)
+                lines = 1
+                for off in range(0, size, 1 << 20):
+                    lines += mm[off:off + (1 << 20)].count(b"\n")
+                return rel_path, lang, mm, lines
+            raw = CodebaseAnalyzer._fast_read(abs_path, size)
+        except Exception:
+            return None
+        content = raw.decode("utf-8", errors="ignore")
+        return rel_path, lang, content, content.count("\n") + 1
+
     def scan_files(self):
         """Walk directory tree, catalogue files, read contents."""
-        for root, dirs, filenames in os.walk(self.repo_path):
-            # Prune skip dirs in-place
-            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
-
-            for fname in filenames:
-                if fname in SKIP_FILES:
+        candidates = []
+        self._walk(self.repo_path, candidates)
+
+        to_read = []
+        for candidate in candidates:
+            self.files.append(candidate[1])
+            self.total_files += 1
+            if candidate[2]:
+                to_read.append(candidate)
+
+        # Reads are blocking I/O that releases the GIL, so fan them out over
+        # threads and aggregate serially to keep dict updates thread-safe.
+        max_workers = min(32, (os.cpu_count() or 4) * 4)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for result in executor.map(self._read_one, to_read, chunksize=32):
+                if result is None:
                     continue
-                abs_path = os.path.join(root, fname)
-                rel_path = os.path.relpath(abs_path, self.repo_path).replace("\\", "/")
+                rel_path, lang, content, line_count = result
+                if content is not None and self._keep_content(rel_path, content, line_count):
+                    if isinstance(content, mmap.mmap):
+                        self.file_mmaps[rel_path] = content
+                    else:
+                        self.file_contents[rel_path] = content
+                    self._bytes_scanned += len(content)
+                elif isinstance(content, mmap.mmap):
+                    content.close()
+                self.total_lines += line_count
+                # Non-code text formats only contribute line counts
+                if lang not in NON_CODE_LANGS:
+                    self.languages[lang] += line_count
 
-                # Skip large files
-                try:
-                    size = os.path.getsize(abs_path)
-                    if size > MAX_FILE_SIZE:
-                        continue
-                except OSError:
-                    continue
+        logger.info(
+            f"Scanned {self.total_files} files, {self.total_lines} lines in {self.repo_path}"
+        )
 
-                ext = os.path.splitext(fname)[1].lower()
-                lang = LANGUAGE_MAP.get(ext)
+    def _keep_content(self, rel_path, content, line_count):
+        """Decide whether a file's content is worth feeding to the detectors.
+
+        Drops minified/bundled artifacts (by suffix or average line length)
+        and stops keeping content once the repo-level byte budget is spent;
+        such files still count toward totals.
+        """
+        if self._bytes_scanned >= SCAN_BYTE_BUDGET:
+            return False
+        if rel_path.endswith(MINIFIED_SUFFIXES):
+            return False
+        if len(content) / max(1, line_count - 1) > MAX_AVG_LINE_LENGTH:
+            return False
+        return True
+
+    def _get_ast(self, path, content):
+        """Parse a Python file once and cache the tree for later passes."""
+        if path not in self.ast_cache:
+            try:
+                self.ast_cache[path] = ast.parse(content, filename=path)
+            except SyntaxError:
+                self.ast_cache[path] = None
+        return self.ast_cache[path]
+
+    def _scan_all(self):
+        """Fused content pass over file_contents.
+
+        Framework imports, tech-stack keywords, entry-point patterns, DB
+        usage, API endpoints and the import graph all consume the same
+        file contents; running them in one loop moves each file through
+        the CPU caches once instead of once per detector.
+        """
+        file_contents = self.file_contents
+        files = self.files
+
+        # Framework signals from dependency files
+        frameworks = []
+        for rule in FRAMEWORK_RULES:
+            for dep_file in rule["files"]:
+                if dep_file in file_contents:
+                    content_lower = file_contents[dep_file].lower()
+                    for kw, name in rule["keywords"].items():
+                        if kw in content_lower:
+                            frameworks.append(name)
+        py_remaining = set(_PY_FRAMEWORK_KEYWORDS.values()) - set(frameworks)
+        js_remaining = set(_JS_FRAMEWORK_KEYWORDS.values()) - set(frameworks)
+
+        # Tech-stack file-existence signals
+        tech_detected = set()
+        for tech, signals in TECH_STACK_SIGNALS.items():
+            for sig_file in signals.get("files", []):
+                if sig_file in files:
+                    tech_detected.add(tech)
+                    break
 
-                self.files.append(rel_path)
-                self.total_files += 1
+        # Entry points from well-known filenames; seen-set dedupes in O(1)
+        entry_points = []
+        entry_seen = set()
+        for f in files:
+            basename = f.rpartition("/")[2]
+            if basename in ENTRY_POINT_FILES:
+                reason = f"Known entry point filename: {basename}"
+                entry_seen.add((f, reason))
+                entry_points.append({"file": f, "reason": reason})
+
+        db_results = []
+        db_seen = set()
+        endpoints = []
+        graph = defaultdict(list)
+        py_items = []
+
+        for path, content in file_contents.items():
+            ext = os.path.splitext(path)[1].lower()
+            lang = LANGUAGE_MAP.get(ext, "")
+            is_js = ext in (".js", ".jsx", ".ts", ".tsx")
+
+            # Framework import scan (skipped once nothing is left to find)
+            if py_remaining and ext == ".py":
+                for m in PY_FRAMEWORK_IMPORT_RE.finditer(content):
+                    name = _PY_FRAMEWORK_KEYWORDS[m.group(1)]
+                    if name in py_remaining:
+                        py_remaining.discard(name)
+                        frameworks.append(name)
+            elif js_remaining and is_js:
+                for m in JS_FRAMEWORK_IMPORT_RE.finditer(content):
+                    name = _JS_FRAMEWORK_KEYWORDS[m.group(1)]
+                    if name in js_remaining:
+                        js_remaining.discard(name)
+                        frameworks.append(name)
+
+            # Tech-stack keywords
+            if len(tech_detected) < _TOTAL_TECHS:
+                for m in TECH_KEYWORD_RE.finditer(content):
+                    tech_detected.add(_TECH_KEYWORD_MAP[m.group(0).lower()])
+
+            # Entry-point content patterns
+            if lang in ENTRY_POINT_REGEXES:
+                for pattern, reason in ENTRY_POINT_REGEXES[lang]:
+                    if pattern.search(content) and (path, reason) not in entry_seen:
+                        entry_seen.add((path, reason))
+                        entry_points.append({"file": path, "reason": reason})
+
+            # Database usage
+            for m in DB_REGEX.finditer(content):
+                db_name = DB_NAMES[m.lastindex - 1]
+                if db_name not in db_seen:
+                    db_results.append({"database": db_name, "file": path})
+                    db_seen.add(db_name)
+
+            # API endpoints
+            endpoints.extend(_endpoints_in_file(path, content, lang))
+
+            # Import graph
+            if ext == ".py":
+                py_items.append((path, content))
+            elif is_js:
+                for m in _JS_IMPORT_RE.finditer(content):
+                    dep = m.group(1) or m.group(2)
+                    if dep:
+                        graph[path].append(dep)
+            elif ext == ".java":
+                for m in _JAVA_IMPORT_RE.finditer(content):
+                    graph[path].append(m.group(1))
+            elif ext == ".go":
+                for m in _GO_IMPORT_RE.finditer(content):
+                    graph[path].append(m.group(1))
 
-                # Read text files
-                if lang and lang not in ("json", "xml", "markdown", "text"):
-                    try:
-                        with open(abs_path, "r", encoding="utf-8", errors="ignore") as f:
-                            content = f.read()
-                        self.file_contents[rel_path] = content
-                        line_count = content.count("\n") + 1
-                        self.languages[lang] += line_count
-                        self.total_lines += line_count
-                    except Exception:
-                        pass
-                elif lang:
-                    # Still count these
-                    try:
-                        with open(abs_path, "r", encoding="utf-8", errors="ignore") as f:
-                            content = f.read()
-                        self.file_contents[rel_path] = content
-                        self.total_lines += content.count("\n") + 1
-                    except Exception:
-                        pass
+        # Memory-mapped large files: same detectors, byte-compiled twins,
+        # no str decode — the OS pages in only what the regexes touch.
+        for path, mm in self.file_mmaps.items():
+            ext = os.path.splitext(path)[1].lower()
+            lang = LANGUAGE_MAP.get(ext, "")
+
+            if py_remaining and ext == ".py":
+                for m in PY_FRAMEWORK_IMPORT_RE_B.finditer(mm):
+                    name = _PY_FRAMEWORK_KEYWORDS[m.group(1).decode("latin-1")]
+                    if name in py_remaining:
+                        py_remaining.discard(name)
+                        frameworks.append(name)
+            elif js_remaining and ext in (".js", ".jsx", ".ts", ".tsx"):
+                for m in JS_FRAMEWORK_IMPORT_RE_B.finditer(mm):
+                    name = _JS_FRAMEWORK_KEYWORDS[m.group(1).decode("latin-1")]
+                    if name in js_remaining:
+                        js_remaining.discard(name)
+                        frameworks.append(name)
+
+            if len(tech_detected) < _TOTAL_TECHS:
+                for m in TECH_KEYWORD_RE_B.finditer(mm):
+                    tech_detected.add(_TECH_KEYWORD_MAP[m.group(0).decode("latin-1").lower()])
+
+            if lang in ENTRY_POINT_REGEXES_B:
+                for pattern, reason in ENTRY_POINT_REGEXES_B[lang]:
+                    if pattern.search(mm) and (path, reason) not in entry_seen:
+                        entry_seen.add((path, reason))
+                        entry_points.append({"file": path, "reason": reason})
+
+            for m in DB_REGEX_B.finditer(mm):
+                db_name = DB_NAMES[m.lastindex - 1]
+                if db_name not in db_seen:
+                    db_results.append({"database": db_name, "file": path})
+                    db_seen.add(db_name)
+
+            endpoints.extend(_endpoints_in_bytes(path, mm, lang))
+
+            if ext == ".py":
+                # Import extraction needs the AST; decode this one file
+                py_items.append((path, mm[:].decode("utf-8", errors="ignore")))
+
+        _resolve_py_imports(graph, py_items, analyzer=self)
+        top_files = sorted(graph.keys(), key=lambda k: len(graph[k]), reverse=True)[:100]
 
-        logger.info(
-            f"Scanned {self.total_files} files, {self.total_lines} lines in {self.repo_path}"
+        return {
+            "framework": frameworks if frameworks else ["Unknown"],
+            "tech_stack": sorted(tech_detected),
+            "entry_points": entry_points,
+            "database_usage": db_results,
+            "api_endpoints": endpoints,
+            "dependency_graph": {k: graph[k] for k in top_files},
+        }
+
+    # ------------------------------------------------------------------
+    # Result cache — keyed on a content signature of the scanned tree
+    # ------------------------------------------------------------------
+    def _content_hash(self):
+        """Digest of (path, size, mtime) for every scanned file.
+
+        Re-analysing an unchanged clone (e.g. "Refresh" clicks, doc + diagram
+        generation back to back) is the common case, so a cheap stat-based
+        signature lets analyze() skip the whole detector pipeline.
+        """
+        h = hashlib.blake2b(digest_size=16)
+        for rel_path, size, mtime in sorted(self._stat_sig):
+            h.update(f"{rel_path}|{size}|{mtime}\n".encode())
+        return h.hexdigest()
+
+    def _cache_file(self, cache_key):
+        # Repos are cloned under UPLOAD_FOLDER/<repo_id>, so the parent
+        # directory is the shared temp root — keep the cache beside them.
+        return os.path.join(
+            os.path.dirname(self.repo_path), ".analyzer_cache", f"{cache_key}.json"
         )
 
+    def _load_cached_result(self, cache_key):
+        try:
+            with open(self._cache_file(cache_key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _store_cached_result(self, cache_key, result):
+        cache_file = self._cache_file(cache_key)
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            tmp_path = cache_file + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(result, f)
+            os.replace(tmp_path, cache_file)
+        except OSError:
+            pass  # cache is best-effort; analysis result is still returned
+
     # ------------------------------------------------------------------
     # 2. Full analysis pipeline
     # ------------------------------------------------------------------
@@ -141,31 +481,45 @@ class CodebaseAnalyzer:
         """Run complete analysis pipeline. Returns structured result."""
         self.scan_files()
 
-        framework = detect_framework(self.repo_path, self.file_contents, self.files)
-        tech_stack = detect_tech_stack(self.repo_path, self.file_contents, self.files)
-        entry_points = detect_entry_points(self.repo_path, self.file_contents, self.files)
+        cache_key = self._content_hash()
+        cached = self._load_cached_result(cache_key)
+        if cached is not None:
+            for mm in self.file_mmaps.values():
+                mm.close()
+            self.file_mmaps.clear()
+            logger.info(f"Analysis cache hit for {self.repo_path}")
+            return cached
+
+        try:
+            # Content detectors run fused in one pass; path-only detectors
+            # (architecture, components, folder tree) stay separate.
+            scan = self._scan_all()
+        finally:
+            for mm in self.file_mmaps.values():
+                mm.close()
+            self.file_mmaps.clear()
+
         architecture = classify_architecture(self.files, self.file_contents)
         components = detect_components(self.files, self.file_contents)
-        db_usage = detect_database_usage(self.file_contents)
-        api_endpoints = detect_api_endpoints(self.file_contents)
-        dependency_graph = build_import_graph(self.file_contents)
         folder_structure = build_folder_tree(self.files)
 
-        return {
-            "framework": framework,
-            "tech_stack": tech_stack,
-            "entry_points": entry_points,
+        result = {
+            "framework": scan["framework"],
+            "tech_stack": scan["tech_stack"],
+            "entry_points": scan["entry_points"],
             "architecture_type": architecture,
             "components": components,
-            "database_usage": db_usage,
-            "api_endpoints": api_endpoints,
-            "dependency_graph": dependency_graph,
+            "database_usage": scan["database_usage"],
+            "api_endpoints": scan["api_endpoints"],
+            "dependency_graph": scan["dependency_graph"],
             "folder_structure": folder_structure,
             "languages": dict(self.languages),
             "total_files": self.total_files,
             "total_lines": self.total_lines,
             "files": self.files[:500],  # cap for storage
         }
+        self._store_cached_result(cache_key, result)
+        return result
 
 
 # ======================================================================
@@ -201,6 +555,25 @@ FRAMEWORK_RULES = [
 ]
 
 
+# Fused import-scan regexes: one alternation per ecosystem so each file is
+# swept once instead of once per keyword. Compiled at module load.
+_PY_FRAMEWORK_KEYWORDS = FRAMEWORK_RULES[0]["keywords"]
+_JS_FRAMEWORK_KEYWORDS = FRAMEWORK_RULES[1]["keywords"]
+PY_FRAMEWORK_IMPORT_RE = re.compile(
+    r"^\s*(?:import|from)\s+("
+    + "|".join(sorted(_PY_FRAMEWORK_KEYWORDS, key=len, reverse=True)) + ")",
+    re.MULTILINE,
+)
+JS_FRAMEWORK_IMPORT_RE = re.compile(
+    r"""(?:require\(|from\s+)['"]("""
+    + "|".join(sorted(_JS_FRAMEWORK_KEYWORDS, key=len, reverse=True)) + ")"
+)
+PY_FRAMEWORK_IMPORT_RE_B = re.compile(
+    PY_FRAMEWORK_IMPORT_RE.pattern.encode("latin-1"), re.MULTILINE
+)
+JS_FRAMEWORK_IMPORT_RE_B = re.compile(JS_FRAMEWORK_IMPORT_RE.pattern.encode("latin-1"))
+
+
 def detect_framework(repo_path, file_contents, files):
     """Detect primary framework from dependency files and imports."""
     detected = []
@@ -213,20 +586,28 @@ def detect_framework(repo_path, file_contents, files):
                     if kw in content_lower:
                         detected.append(name)
 
-    # Also scan imports in code
+    # Also scan imports in code (single fused regex pass per file); stop as
+    # soon as every known framework for both ecosystems has been seen —
+    # when requirements.txt/package.json already told the story, the rest
+    # of the file loop is skipped entirely.
+    py_remaining = set(_PY_FRAMEWORK_KEYWORDS.values()) - set(detected)
+    js_remaining = set(_JS_FRAMEWORK_KEYWORDS.values()) - set(detected)
+
     for path, content in file_contents.items():
-        if path.endswith(".py"):
-            for kw, name in FRAMEWORK_RULES[0]["keywords"].items():
-                if re.search(rf"^\s*(import|from)\s+{kw}", content, re.MULTILINE):
-                    if name not in detected:
-                        detected.append(name)
-        elif path.endswith((".js", ".jsx", ".ts", ".tsx")):
-            for kw, name in FRAMEWORK_RULES[1]["keywords"].items():
-                if re.search(
-                    rf"""require\(['"]{kw}|from\s+['"]{kw}""", content
-                ):
-                    if name not in detected:
-                        detected.append(name)
+        if not py_remaining and not js_remaining:
+            break
+        if py_remaining and path.endswith(".py"):
+            for m in PY_FRAMEWORK_IMPORT_RE.finditer(content):
+                name = _PY_FRAMEWORK_KEYWORDS[m.group(1)]
+                if name in py_remaining:
+                    py_remaining.discard(name)
+                    detected.append(name)
+        elif js_remaining and path.endswith((".js", ".jsx", ".ts", ".tsx")):
+            for m in JS_FRAMEWORK_IMPORT_RE.finditer(content):
+                name = _JS_FRAMEWORK_KEYWORDS[m.group(1)]
+                if name in js_remaining:
+                    js_remaining.discard(name)
+                    detected.append(name)
 
     return detected if detected else ["Unknown"]
 
@@ -275,23 +656,41 @@ TECH_STACK_SIGNALS = {
 }
 
 
+# keyword → tech lookup plus one fused alternation so every file gets a
+# single multi-keyword sweep instead of one substring scan per keyword
+# over a concatenated copy of the whole codebase.
+_TECH_KEYWORD_MAP = {
+    kw.lower(): tech
+    for tech, signals in TECH_STACK_SIGNALS.items()
+    for kw in signals.get("keywords", [])
+}
+TECH_KEYWORD_RE = re.compile(
+    "|".join(
+        re.escape(kw) for kw in sorted(_TECH_KEYWORD_MAP, key=len, reverse=True)
+    ),
+    re.IGNORECASE,
+)
+TECH_KEYWORD_RE_B = re.compile(TECH_KEYWORD_RE.pattern.encode("latin-1"), re.IGNORECASE)
+_TOTAL_TECHS = len(TECH_STACK_SIGNALS)
+
+
 def detect_tech_stack(repo_path, file_contents, files):
     """Detect tech stack components."""
     detected = set()
-    all_content = "\n".join(file_contents.values()).lower()
 
+    # Check file existence signals
     for tech, signals in TECH_STACK_SIGNALS.items():
-        # Check file existence
         for sig_file in signals.get("files", []):
             if sig_file in files:
                 detected.add(tech)
                 break
 
-        # Check keywords in content
-        for kw in signals.get("keywords", []):
-            if kw in all_content:
-                detected.add(tech)
-                break
+    # Check keywords per file — one fused pass, early exit once all found
+    for content in file_contents.values():
+        for m in TECH_KEYWORD_RE.finditer(content):
+            detected.add(_TECH_KEYWORD_MAP[m.group(0).lower()])
+        if len(detected) == _TOTAL_TECHS:
+            break
 
     return sorted(detected)
 
@@ -318,6 +717,17 @@ ENTRY_POINT_PATTERNS = {
     ],
 }
 
+# Precompiled per-language pattern lists (compiled once at module load);
+# the _B twins run over memory-mapped large files without decoding.
+ENTRY_POINT_REGEXES = {
+    lang: [(re.compile(p), reason) for p, reason in patterns]
+    for lang, patterns in ENTRY_POINT_PATTERNS.items()
+}
+ENTRY_POINT_REGEXES_B = {
+    lang: [(re.compile(p.encode("latin-1")), reason) for p, reason in patterns]
+    for lang, patterns in ENTRY_POINT_PATTERNS.items()
+}
+
 ENTRY_POINT_FILES = [
     "main.py", "app.py", "run.py", "server.py", "wsgi.py", "asgi.py",
     "manage.py", "index.py",
@@ -332,23 +742,28 @@ ENTRY_POINT_FILES = [
 def detect_entry_points(repo_path, file_contents, files):
     """Find entry points in the codebase."""
     results = []
+    seen = set()
+
+    def _add(file, reason):
+        key = (file, reason)
+        if key not in seen:
+            seen.add(key)
+            results.append({"file": file, "reason": reason})
 
     # Check well-known entry point filenames
     for f in files:
         basename = os.path.basename(f)
         if basename in ENTRY_POINT_FILES:
-            results.append({"file": f, "reason": f"Known entry point filename: {basename}"})
+            _add(f, f"Known entry point filename: {basename}")
 
     # Pattern matching in file content
     for path, content in file_contents.items():
         ext = os.path.splitext(path)[1].lower()
         lang = LANGUAGE_MAP.get(ext)
-        if lang and lang in ENTRY_POINT_PATTERNS:
-            for pattern, reason in ENTRY_POINT_PATTERNS[lang]:
-                if re.search(pattern, content):
-                    entry = {"file": path, "reason": reason}
-                    if entry not in results:
-                        results.append(entry)
+        if lang and lang in ENTRY_POINT_REGEXES:
+            for pattern, reason in ENTRY_POINT_REGEXES[lang]:
+                if pattern.search(content):
+                    _add(path, reason)
 
     return results
 
@@ -388,13 +803,12 @@ ARCHITECTURE_PATTERNS = {
 
 def classify_architecture(files, file_contents):
     """Classify architecture pattern from folder structure."""
-    dir_names = set()
-    for f in files:
-        parts = f.split("/")
-        for p in parts[:-1]:
-            dir_names.add(p.lower())
+    # Lowercase the whole path once and split once — avoids a method call
+    # per component in what is the hottest loop on large file lists.
+    dir_names = {p for f in files for p in f.lower().split("/")[:-1]}
 
-    file_basenames = {os.path.basename(f) for f in files}
+    # Paths are already normalized to "/", so rpartition beats os.path.basename
+    file_basenames = {f.rpartition("/")[2] for f in files}
 
     for arch, pattern in ARCHITECTURE_PATTERNS.items():
         if arch == "Monolithic":
@@ -432,23 +846,31 @@ COMPONENT_HEURISTICS = {
 }
 
 
+# keyword → (category priority, category), fused into one alternation so each
+# path gets a single sweep instead of ~40 substring scans. Priority preserves
+# the original category iteration order when a path matches several keywords.
+_COMPONENT_KEYWORD_MAP = {}
+for _prio, (_cat, _kws) in enumerate(COMPONENT_HEURISTICS.items()):
+    for _kw in _kws:
+        _COMPONENT_KEYWORD_MAP.setdefault(_kw, (_prio, _cat))
+COMPONENT_KEYWORD_RE = re.compile(
+    "|".join(
+        re.escape(kw) for kw in sorted(_COMPONENT_KEYWORD_MAP, key=len, reverse=True)
+    )
+)
+
+
 def detect_components(files, file_contents):
     """Classify files into architectural components."""
     components = defaultdict(list)
 
     for f in files:
-        lower = f.lower()
-        categorized = False
-        for category, keywords in COMPONENT_HEURISTICS.items():
-            for kw in keywords:
-                if kw in lower:
-                    components[category].append(f)
-                    categorized = True
-                    break
-            if categorized:
-                break
-        if not categorized:
-            components["other"].append(f)
+        best = None
+        for m in COMPONENT_KEYWORD_RE.finditer(f.lower()):
+            hit = _COMPONENT_KEYWORD_MAP[m.group(0)]
+            if best is None or hit < best:
+                best = hit
+        components[best[1] if best else "other"].append(f)
 
     return {k: v[:50] for k, v in components.items()}  # cap per category
 
@@ -472,6 +894,14 @@ DB_PATTERNS = [
     (r"dynamodb", "AWS DynamoDB"),
 ]
 
+# Single fused alternation: one finditer sweep classifies every DB pattern.
+# Group index maps back into DB_NAMES.
+DB_REGEX = re.compile(
+    "|".join(f"({p})" for p, _ in DB_PATTERNS), re.IGNORECASE
+)
+DB_REGEX_B = re.compile(DB_REGEX.pattern.encode("latin-1"), re.IGNORECASE)
+DB_NAMES = [name for _, name in DB_PATTERNS]
+
 
 def detect_database_usage(file_contents):
     """Detect database usage patterns."""
@@ -479,11 +909,11 @@ def detect_database_usage(file_contents):
     seen = set()
 
     for path, content in file_contents.items():
-        for pattern, db_name in DB_PATTERNS:
-            if re.search(pattern, content, re.IGNORECASE):
-                if db_name not in seen:
-                    results.append({"database": db_name, "file": path})
-                    seen.add(db_name)
+        for m in DB_REGEX.finditer(content):
+            db_name = DB_NAMES[m.lastindex - 1]
+            if db_name not in seen:
+                results.append({"database": db_name, "file": path})
+                seen.add(db_name)
 
     return results
 
@@ -492,58 +922,73 @@ def detect_database_usage(file_contents):
 # API ENDPOINT DETECTION
 # ======================================================================
 
-API_PATTERNS = [
-    # Flask
-    (r'@\w+\.route\(["\'](.+?)["\'].*?\)\s*\ndef\s+(\w+)',
-     "Flask", ["python"]),
+# One compiled byte pattern per framework; the Flask pattern captures the
+# optional methods=[...] kwarg in the same match so there is no look-back
+# slicing over preceding content. Named groups keep extraction uniform.
+API_REGEXES = [
+    # Flask — route + optional methods kwarg in one pass
+    (re.compile(
+        rb'@\w+\.route\(\s*["\'](?P<route>[^"\']+)["\']'
+        rb'(?:[^)]*?methods\s*=\s*\[(?P<methods>[^\]]+)\])?[^)]*\)\s*\n\s*def\s+\w+',
+        re.MULTILINE),
+     "Flask", ("python",)),
     # Django
-    (r'path\(["\'](.+?)["\'].*?,\s*(\w+)',
-     "Django", ["python"]),
+    (re.compile(rb'path\(["\'](?P<route>.+?)["\'].*?,\s*\w+'),
+     "Django", ("python",)),
     # Express.js
-    (r'(?:app|router)\.(get|post|put|delete|patch)\(["\'](.+?)["\']',
-     "Express", ["javascript", "typescript"]),
+    (re.compile(rb'(?:app|router)\.(?P<method>get|post|put|delete|patch)\(["\'](?P<route>.+?)["\']'),
+     "Express", ("javascript", "typescript")),
     # FastAPI
-    (r'@\w+\.(get|post|put|delete|patch)\(["\'](.+?)["\']',
-     "FastAPI", ["python"]),
+    (re.compile(rb'@\w+\.(?P<method>get|post|put|delete|patch)\(["\'](?P<route>.+?)["\']'),
+     "FastAPI", ("python",)),
 ]
 
 
+def _endpoints_in_bytes(path, data, lang):
+    """Extract API endpoint records from a bytes-like buffer (str-free)."""
+    endpoints = []
+    for pattern, framework, langs in API_REGEXES:
+        if lang not in langs:
+            continue
+        for match in pattern.finditer(data):
+            groups = match.groupdict()
+            route = groups["route"].decode("utf-8", errors="ignore")
+
+            method_raw = groups.get("method")
+            methods_kwarg = groups.get("methods")
+            if method_raw:
+                method = method_raw.decode("ascii").upper()
+            elif methods_kwarg:
+                method = (methods_kwarg.decode("utf-8", errors="ignore")
+                          .replace("'", "").replace('"', "").strip())
+            else:
+                method = "GET"  # default
+
+            endpoints.append({
+                "method": method,
+                "route": route,
+                "file": path,
+                "framework": framework,
+            })
+
+    return endpoints
+
+
+def _endpoints_in_file(path, content, lang):
+    """Extract API endpoint records from a single file's content."""
+    if not any(lang in langs for _, _, langs in API_REGEXES):
+        return []
+    # Encode once per file; byte-level matching skips the Unicode
+    # machinery inside the regex engine
+    return _endpoints_in_bytes(path, content.encode("utf-8", errors="ignore"), lang)
+
+
 def detect_api_endpoints(file_contents):
     """Detect API endpoints from route definitions."""
     endpoints = []
-
     for path, content in file_contents.items():
         ext = os.path.splitext(path)[1].lower()
-        lang = LANGUAGE_MAP.get(ext, "")
-
-        for pattern, framework, langs in API_PATTERNS:
-            if lang not in langs:
-                continue
-            for match in re.finditer(pattern, content):
-                groups = match.groups()
-                if framework == "Express":
-                    method = groups[0].upper()
-                    route = groups[1]
-                elif framework == "FastAPI":
-                    method = groups[0].upper()
-                    route = groups[1]
-                else:
-                    route = groups[0]
-                    method = "GET"  # default
-                    # Try to detect method from decorators
-                    preceding = content[:match.start()]
-                    if "methods=" in preceding[-200:]:
-                        m = re.search(r'methods=\[(.+?)\]', preceding[-200:])
-                        if m:
-                            method = m.group(1).replace("'", "").replace('"', "").strip()
-
-                endpoints.append({
-                    "method": method,
-                    "route": route,
-                    "file": path,
-                    "framework": framework,
-                })
-
+        endpoints.extend(_endpoints_in_file(path, content, LANGUAGE_MAP.get(ext, "")))
     return endpoints
 
 
@@ -551,47 +996,111 @@ def detect_api_endpoints(file_contents):
 # IMPORT / DEPENDENCY GRAPH
 # ======================================================================
 
-def build_import_graph(file_contents):
-    """Build module-level import/dependency graph."""
+# Import-extraction regexes, compiled once at module load
+_PY_IMPORT_FALLBACK_RE = re.compile(r"^\s*(?:from|import)\s+([\w.]+)", re.MULTILINE)
+_JS_IMPORT_RE = re.compile(
+    r"""(?:require|import\s+.*?\s+from)\s*\(\s*['"](.+?)['"]\s*\)|import\s+.*?\s+from\s+['"](.+?)['"]"""
+)
+_JAVA_IMPORT_RE = re.compile(r"^import\s+([\w.]+);", re.MULTILINE)
+_GO_IMPORT_RE = re.compile(r'"([\w./-]+)"')
+
+
+# Above this many Python files the AST parses go to a process pool;
+# below it, pool spawn overhead outweighs the parallelism.
+_PY_PARSE_POOL_THRESHOLD = 200
+
+
+def _imports_from_tree(tree):
+    """Collect imported module names from a parsed AST.
+
+    Names are interned — the same modules appear across most files in a
+    repo, so they collapse to shared objects in the graph.
+    """
+    modules = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                modules.append(sys.intern(alias.name))
+        elif isinstance(node, ast.ImportFrom):
+            if node.module:
+                modules.append(sys.intern(node.module))
+    return modules
+
+
+def _extract_py_imports(item):
+    """Worker: extract imported module names from one Python source file.
+
+    Top-level and returns plain lists so it stays picklable for
+    ProcessPoolExecutor; falls back to regex on syntax errors.
+    """
+    path, content = item
+    try:
+        tree = ast.parse(content, filename=path)
+    except SyntaxError:
+        return path, [m.group(1) for m in _PY_IMPORT_FALLBACK_RE.finditer(content)]
+    return path, _imports_from_tree(tree)
+
+
+def _resolve_py_imports(graph, py_items, analyzer=None):
+    """Extend graph with Python imports, via process pool on large repos.
+
+    Under gevent the process pool is skipped: forking from a fully
+    monkey-patched process (greenlet-backed management threads plus
+    multiprocessing locks) is a known deadlock hazard.
+    """
+    from executors import process_pool_available
+    if len(py_items) > _PY_PARSE_POOL_THRESHOLD and process_pool_available():
+        # ast.parse is CPU-bound under the GIL — fan out across cores
+        with ProcessPoolExecutor() as executor:
+            for path, modules in executor.map(_extract_py_imports, py_items, chunksize=64):
+                graph[path].extend(modules)
+    else:
+        for path, content in py_items:
+            if analyzer is not None:
+                tree = analyzer._get_ast(path, content)
+                if tree is not None:
+                    modules = _imports_from_tree(tree)
+                else:
+                    modules = [m.group(1) for m in _PY_IMPORT_FALLBACK_RE.finditer(content)]
+            else:
+                _, modules = _extract_py_imports((path, content))
+            graph[path].extend(modules)
+
+
+def build_import_graph(file_contents, analyzer=None):
+    """Build module-level import/dependency graph.
+
+    When an ``analyzer`` is supplied, parsed Python ASTs are fetched from
+    (and stored in) its cache so other passes never reparse the same file.
+    On Python-heavy repos the parses escape the GIL via a process pool,
+    shipping back just the import lists to keep pickle cost small.
+    """
     graph = defaultdict(list)
+    py_items = []
 
     for path, content in file_contents.items():
         ext = os.path.splitext(path)[1].lower()
 
         if ext == ".py":
-            # Python AST-based import extraction
-            try:
-                tree = ast.parse(content, filename=path)
-                for node in ast.walk(tree):
-                    if isinstance(node, ast.Import):
-                        for alias in node.names:
-                            graph[path].append(alias.name)
-                    elif isinstance(node, ast.ImportFrom):
-                        if node.module:
-                            graph[path].append(node.module)
-            except SyntaxError:
-                # Fallback to regex
-                for m in re.finditer(r"^\s*(?:from|import)\s+([\w.]+)", content, re.MULTILINE):
-                    graph[path].append(m.group(1))
+            py_items.append((path, content))
 
         elif ext in (".js", ".jsx", ".ts", ".tsx"):
             # JS/TS: require() and import ... from
-            for m in re.finditer(
-                r"""(?:require|import\s+.*?\s+from)\s*\(\s*['"](.+?)['"]\s*\)|import\s+.*?\s+from\s+['"](.+?)['"]""",
-                content,
-            ):
+            for m in _JS_IMPORT_RE.finditer(content):
                 dep = m.group(1) or m.group(2)
                 if dep:
                     graph[path].append(dep)
 
         elif ext == ".java":
-            for m in re.finditer(r"^import\s+([\w.]+);", content, re.MULTILINE):
+            for m in _JAVA_IMPORT_RE.finditer(content):
                 graph[path].append(m.group(1))
 
         elif ext == ".go":
-            for m in re.finditer(r'"([\w./-]+)"', content):
+            for m in _GO_IMPORT_RE.finditer(content):
                 graph[path].append(m.group(1))
 
+    _resolve_py_imports(graph, py_items, analyzer=analyzer)
+
     # Filter to top 100 nodes for storage
     top_files = sorted(graph.keys(), key=lambda k: len(graph[k]), reverse=True)[:100]
     return {k: graph[k] for k in top_files}
@@ -602,44 +1111,53 @@ def build_import_graph(file_contents):
 # ======================================================================
 
 def build_folder_tree(files, max_depth=4):
-    """Build a hierarchical folder structure dict."""
+    """Build a hierarchical folder structure dict.
+
+    Walks each path with str.find instead of split() to avoid a list
+    allocation per file; component strings are interned so repeated
+    dirnames (src, components, ...) share one object across the trie.
+    """
     tree = {}
     for f in files:
-        parts = f.split("/")
         node = tree
-        for i, part in enumerate(parts):
-            if i >= max_depth:
-                break
-            if i == len(parts) - 1:
+        pos = 0
+        depth = 0
+        while depth < max_depth:
+            nxt = f.find("/", pos)
+            if nxt == -1:
                 # File leaf
-                node[part] = "file"
-            else:
-                if part not in node:
-                    node[part] = {}
-                node = node[part]
+                node[sys.intern(f[pos:])] = "file"
+                break
+            part = sys.intern(f[pos:nxt])
+            node = node.setdefault(part, {})
+            pos = nxt + 1
+            depth += 1
     return tree
 
 
-def folder_tree_to_string(tree, prefix="", max_lines=100):
-    """Convert folder tree dict to readable string."""
-    lines = []
+def _tree_lines(tree, prefix=""):
+    """Yield rendered tree lines one at a time (depth-first)."""
     items = sorted(tree.items(), key=lambda x: (x[1] == "file", x[0]))
+    last_idx = len(items) - 1
 
     for i, (name, value) in enumerate(items):
-        if len(lines) >= max_lines:
-            lines.append(f"{prefix}... (truncated)")
-            break
-
-        is_last = i == len(items) - 1
+        is_last = i == last_idx
         connector = "└── " if is_last else "├── "
-        extension = "    " if is_last else "│   "
 
         if value == "file":
-            lines.append(f"{prefix}{connector}{name}")
+            yield f"{prefix}{connector}{name}"
         else:
-            lines.append(f"{prefix}{connector}{name}/")
-            sub = folder_tree_to_string(value, prefix + extension, max_lines - len(lines))
-            if sub:
-                lines.append(sub)
+            yield f"{prefix}{connector}{name}/"
+            yield from _tree_lines(value, prefix + ("    " if is_last else "│   "))
+
 
+def folder_tree_to_string(tree, prefix="", max_lines=100):
+    """Convert folder tree dict to readable string.
+
+    Lines stream out of a generator and are joined exactly once, instead
+    of each recursion level joining and re-joining its sublists.
+    """
+    lines = list(islice(_tree_lines(tree, prefix), max_lines + 1))
+    if len(lines) > max_lines:
+        lines[max_lines:] = [f"{prefix}... (truncated)"]
     return "\n".join(lines)
@@ -7,10 +7,39 @@ Auto-generate Mermaid.js diagrams:
 - Dependency graph
 """
 
-import logging
-from collections import defaultdict
+import io
+import re
+import json
+import heapq
+import hashlib
+from itertools import islice
 
-logger = logging.getLogger(__name__)
+# Import roots treated as external packages and hidden from the dependency
+# graph. Matched against the first dotted segment via O(1) set lookup.
+_EXTERNAL_ROOTS = frozenset({
+    "os", "sys", "re", "json", "datetime", "collections", "typing",
+    "pathlib", "logging", "functools", "io", "math", "hashlib", "uuid",
+    "time", "react", "vue", "express", "path", "fs", "http", "url",
+})
+_EXTERNAL_PREFIXES = ("@",)  # scoped npm packages
+
+_EXT_RE = re.compile(r"\.(?:py|js|ts|jsx|tsx)$")
+
+# Mermaid-unsafe characters in node labels: quotes become apostrophes,
+# angle brackets are stripped. One C-level pass via str.translate.
+_LABEL_TRANS = str.maketrans({'"': "'", "<": "", ">": ""})
+
+
+def _shortname(path: str) -> str:
+    """Basename without a code extension — node label for diagrams."""
+    return _EXT_RE.sub("", path.rpartition("/")[2])
+
+
+# Rendered Mermaid code per (analysis digest, diagram kind). Diagram
+# generation is a pure function of the analysis result, and the same
+# analysis is re-rendered on every diagram request.
+_render_cache = {}
+_RENDER_CACHE_MAX = 256
 
 
 class DiagramGenerator:
@@ -18,17 +47,47 @@ class DiagramGenerator:
 
     def __init__(self, analysis_result: dict):
         self.result = analysis_result
+        self._digest = None
+
+    def _memoized(self, kind: str, render) -> str:
+        key = (self._result_digest(), kind)
+        cached = _render_cache.get(key)
+        if cached is None:
+            cached = render()
+            if len(_render_cache) >= _RENDER_CACHE_MAX:
+                _render_cache.clear()
+            _render_cache[key] = cached
+        return cached
+
+    def _result_digest(self) -> bytes:
+        if self._digest is None:
+            payload = json.dumps(self.result, sort_keys=True, default=str)
+            self._digest = hashlib.blake2b(payload.encode(), digest_size=16).digest()
+        return self._digest
 
     def generate_architecture_diagram(self) -> str:
         """Generate architecture diagram in Mermaid syntax."""
+        return self._memoized("architecture", self._render_architecture_diagram)
+
+    def _render_architecture_diagram(self) -> str:
         components = self.result.get("components", {})
         framework = self.result.get("framework", ["Unknown"])[0]
         arch = self.result.get("architecture_type", "Monolithic")
 
-        lines = ["graph TB"]
-        lines.append(f'    Title["{framework} - {arch} Architecture"]')
-        lines.append('    style Title fill:#f9f,stroke:#333,stroke-width:2px')
-        lines.append("")
+        # One membership probe per category instead of re-testing below
+        has_routes = "routes" in components
+        has_controllers = "controllers" in components
+        has_services = "services" in components
+        has_models = "models" in components
+
+        # Write into one StringIO buffer instead of appending hundreds of
+        # small strings to a list — no intermediate list, one final copy.
+        buf = io.StringIO()
+        w = buf.write
+        w("graph TB\n")
+        w(f'    Title["{framework} - {arch} Architecture"]\n')
+        w("    style Title fill:#f9f,stroke:#333,stroke-width:2px\n")
+        w("\n")
 
         # Track first node in each layer for connections
         api_first = None
@@ -37,175 +96,193 @@ class DiagramGenerator:
         db_first = None
 
         # Client layer
-        lines.append("    subgraph ClientLayer[Client]")
-        lines.append('        UI["User Interface / Browser"]')
-        lines.append("    end")
-        lines.append("")
+        w("    subgraph ClientLayer[Client]\n")
+        w('        UI["User Interface / Browser"]\n')
+        w("    end\n")
+        w("\n")
 
         # API layer
-        has_api = "routes" in components or "controllers" in components
+        has_api = has_routes or has_controllers
         if has_api:
-            lines.append("    subgraph APILayer[API Layer]")
-            if "routes" in components:
-                route_files = components["routes"][:5]
-                for i, f in enumerate(route_files):
-                    name = f.split("/")[-1].replace(".py", "").replace(".js", "")
-                    lines.append(f'        R{i}["{name}"]')
+            w("    subgraph APILayer[API Layer]\n")
+            if has_routes:
+                for i, f in enumerate(islice(components["routes"], 5)):
+                    name = _shortname(f)
+                    w(f'        R{i}["{name}"]\n')
                     if api_first is None:
                         api_first = f"R{i}"
-            if "controllers" in components:
-                ctrl_files = components["controllers"][:5]
-                for i, f in enumerate(ctrl_files):
-                    name = f.split("/")[-1].replace(".py", "").replace(".js", "")
-                    lines.append(f'        C{i}["{name}"]')
+            if has_controllers:
+                for i, f in enumerate(islice(components["controllers"], 5)):
+                    name = _shortname(f)
+                    w(f'        C{i}["{name}"]\n')
                     if api_first is None:
                         api_first = f"C{i}"
-            lines.append("    end")
-            lines.append("")
+            w("    end\n")
+            w("\n")
 
         # Service layer
-        if "services" in components:
-            lines.append("    subgraph SvcLayer[Service Layer]")
-            svc_files = components["services"][:5]
-            for i, f in enumerate(svc_files):
-                name = f.split("/")[-1].replace(".py", "").replace(".js", "")
-                lines.append(f'        S{i}["{name}"]')
+        if has_services:
+            w("    subgraph SvcLayer[Service Layer]\n")
+            for i, f in enumerate(islice(components["services"], 5)):
+                name = _shortname(f)
+                w(f'        S{i}["{name}"]\n')
                 if svc_first is None:
                     svc_first = f"S{i}"
-            lines.append("    end")
-            lines.append("")
+            w("    end\n")
+            w("\n")
 
         # Model layer
-        if "models" in components:
-            lines.append("    subgraph DataLayer[Data Layer]")
-            model_files = components["models"][:5]
-            for i, f in enumerate(model_files):
-                name = f.split("/")[-1].replace(".py", "").replace(".js", "")
-                lines.append(f'        M{i}["{name}"]')
+        if has_models:
+            w("    subgraph DataLayer[Data Layer]\n")
+            for i, f in enumerate(islice(components["models"], 5)):
+                name = _shortname(f)
+                w(f'        M{i}["{name}"]\n')
                 if model_first is None:
                     model_first = f"M{i}"
-            lines.append("    end")
-            lines.append("")
+            w("    end\n")
+            w("\n")
 
         # Database
         db_usage = self.result.get("database_usage", [])
         if db_usage:
-            db_names = list(set(d["database"] for d in db_usage))[:3]
-            lines.append("    subgraph DBLayer[Database]")
+            # dict.fromkeys dedups in one pass and keeps first-seen order,
+            # so the same analysis always renders the same diagram
+            db_names = list(dict.fromkeys(d["database"] for d in db_usage))[:3]
+            w("    subgraph DBLayer[Database]\n")
             for i, db in enumerate(db_names):
-                lines.append(f'        DB{i}[("{db}")]')
+                w(f'        DB{i}[("{db}")]\n')
                 if db_first is None:
                     db_first = f"DB{i}"
-            lines.append("    end")
-            lines.append("")
+            w("    end\n")
+            w("\n")
 
         # Connections — link node IDs, not subgraph names
         if has_api and api_first:
-            lines.append(f"    UI --> {api_first}")
+            w(f"    UI --> {api_first}\n")
         elif svc_first:
-            lines.append(f"    UI --> {svc_first}")
+            w(f"    UI --> {svc_first}\n")
 
-        if "services" in components and svc_first:
+        if has_services and svc_first:
             if api_first:
-                lines.append(f"    {api_first} --> {svc_first}")
-            if "models" in components and model_first:
-                lines.append(f"    {svc_first} --> {model_first}")
+                w(f"    {api_first} --> {svc_first}\n")
+            if has_models and model_first:
+                w(f"    {svc_first} --> {model_first}\n")
             if db_first:
-                lines.append(f"    {svc_first} --> {db_first}")
-        elif "models" in components and model_first:
+                w(f"    {svc_first} --> {db_first}\n")
+        elif has_models and model_first:
             if api_first:
-                lines.append(f"    {api_first} --> {model_first}")
+                w(f"    {api_first} --> {model_first}\n")
             if db_first:
-                lines.append(f"    {model_first} --> {db_first}")
+                w(f"    {model_first} --> {db_first}\n")
         elif db_first:
             if api_first:
-                lines.append(f"    {api_first} --> {db_first}")
+                w(f"    {api_first} --> {db_first}\n")
 
-        return "\n".join(lines)
+        return buf.getvalue().rstrip("\n")
 
     def generate_flow_diagram(self) -> str:
         """Generate request flow diagram."""
+        return self._memoized("flow", self._render_flow_diagram)
+
+    def _render_flow_diagram(self) -> str:
         endpoints = self.result.get("api_endpoints", [])
         entry_points = self.result.get("entry_points", [])
 
-        lines = ["flowchart LR"]
-
         if not endpoints and not entry_points:
-            lines.append('    A["Start"] --> B["Application"]')
-            return "\n".join(lines)
+            return 'flowchart LR\n    A["Start"] --> B["Application"]'
 
-        lines.append('    User["👤 User"] --> Request["HTTP Request"]')
+        buf = io.StringIO()
+        w = buf.write
+        w("flowchart LR\n")
+        w('    User["👤 User"] --> Request["HTTP Request"]\n')
 
         if entry_points:
             ep = entry_points[0]
-            name = ep["file"].split("/")[-1]
-            lines.append(f'    Request --> Entry["{name}"]')
+            name = ep["file"].rpartition("/")[2]
+            w(f'    Request --> Entry["{name}"]\n')
 
             if endpoints:
-                # Group endpoints by method
-                methods = defaultdict(list)
-                for ep in endpoints[:10]:
-                    methods[ep.get("method", "GET")].append(ep.get("route", "/"))
+                # Group endpoints by method — plain dict + setdefault beats
+                # defaultdict for the handful of endpoints shown here
+                methods: dict[str, list[str]] = {}
+                for ep in islice(endpoints, 10):
+                    methods.setdefault(ep.get("method", "GET"), []).append(
+                        ep.get("route", "/")
+                    )
 
-                lines.append('    Entry --> Router["Router / URL Dispatcher"]')
+                w('    Entry --> Router["Router / URL Dispatcher"]\n')
 
                 for method, routes in methods.items():
                     method_id = f"M_{method.replace(' ', '')}"
-                    lines.append(f'    Router --> {method_id}["{method}"]')
-                    for i, route in enumerate(routes[:3]):
-                        safe_route = route.replace('"', "'").replace('<', '').replace('>', '')
-                        lines.append(f'    {method_id} --> {method_id}R{i}["{safe_route}"]')
+                    w(f'    Router --> {method_id}["{method}"]\n')
+                    for i, route in enumerate(islice(routes, 3)):
+                        safe_route = route.translate(_LABEL_TRANS)
+                        w(f'    {method_id} --> {method_id}R{i}["{safe_route}"]\n')
 
-                lines.append('    Router --> Response["Response"]')
-                lines.append('    Response --> User')
+                w('    Router --> Response["Response"]\n')
+                w("    Response --> User\n")
         else:
-            lines.append('    Request --> App["Application"]')
-            lines.append('    App --> Response["Response"]')
-            lines.append('    Response --> User')
+            w('    Request --> App["Application"]\n')
+            w('    App --> Response["Response"]\n')
+            w("    Response --> User\n")
 
-        return "\n".join(lines)
+        return buf.getvalue().rstrip("\n")
 
     def generate_dependency_graph(self) -> str:
         """Generate dependency graph from import analysis."""
+        return self._memoized("dependency", self._render_dependency_graph)
+
+    def _render_dependency_graph(self) -> str:
         dep_graph = self.result.get("dependency_graph", {})
 
         if not dep_graph:
             return 'graph LR\n    A["No dependencies detected"]'
 
-        lines = ["graph LR"]
+        buf = io.StringIO()
+        w = buf.write
+        w("graph LR\n")
+
+        # Filter external deps once for the whole graph, then rank files by
+        # their local degree. Keeps the per-file filter comprehension out of
+        # the render loop and ranks by what actually gets drawn.
+        local_graph = {
+            file_path: [d for d in deps
+                        if d.split(".", 1)[0] not in _EXTERNAL_ROOTS
+                        and not d.startswith(_EXTERNAL_PREFIXES)]
+            for file_path, deps in dep_graph.items()
+        }
 
-        # Limit to top 20 files with most dependencies
-        sorted_files = sorted(dep_graph.items(), key=lambda x: len(x[1]), reverse=True)[:20]
+        # Limit to top 20 files with most (local) dependencies — nlargest is
+        # O(N log 20) and never materializes the fully sorted list
+        sorted_files = heapq.nlargest(20, local_graph.items(), key=lambda kv: len(kv[1]))
 
         node_ids = {}
+        declared = set()  # node ids already declared (O(1) dedup)
         counter = 0
 
-        for file_path, deps in sorted_files:
+        for file_path, local_deps in sorted_files:
             if file_path not in node_ids:
                 node_ids[file_path] = f"N{counter}"
                 counter += 1
 
             file_id = node_ids[file_path]
-            short_name = file_path.split("/")[-1]
-            lines.append(f'    {file_id}["{short_name}"]')
-
-            # Only show local deps (not external packages)
-            local_deps = [d for d in deps if not d.startswith(("os", "sys", "re", "json",
-                          "datetime", "collections", "typing", "pathlib", "logging",
-                          "functools", "io", "math", "hashlib", "uuid", "time",
-                          "react", "vue", "@", "express", "path", "fs", "http", "url"))]
+            short_name = file_path.rpartition("/")[2]
+            if file_id not in declared:
+                declared.add(file_id)
+                w(f'    {file_id}["{short_name}"]\n')
 
-            for dep in local_deps[:5]:
+            for dep in islice(local_deps, 5):
                 dep_short = dep.split(".")[-1] if "." in dep else dep
                 if dep not in node_ids:
                     node_ids[dep] = f"N{counter}"
                     counter += 1
                 dep_id = node_ids[dep]
-                if f'    {dep_id}["{dep_short}"]' not in lines:
-                    lines.append(f'    {dep_id}["{dep_short}"]')
-                lines.append(f"    {file_id} --> {dep_id}")
+                if dep_id not in declared:
+                    declared.add(dep_id)
+                    w(f'    {dep_id}["{dep_short}"]\n')
+                w(f"    {file_id} --> {dep_id}\n")
 
-        return "\n".join(lines)
+        return buf.getvalue().rstrip("\n")
 
     def generate_all(self) -> dict:
         """Generate all diagram types."""
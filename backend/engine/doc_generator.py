@@ -5,11 +5,29 @@ Generates structured documentation from analysis results.
 Supports: Markdown, PDF export.
 """
 
-import os
-import logging
+import io
+import json
+import hashlib
+from itertools import islice
 from datetime import datetime
 
-logger = logging.getLogger(__name__)
+try:
+    from engine.analyzer import folder_tree_to_string
+except ImportError:  # pragma: no cover - analyzer unavailable in isolation
+    folder_tree_to_string = None
+
+# Component categories in documentation order — matches the analyzer's
+# COMPONENT_HEURISTICS and keeps report output deterministic while skipping
+# the catch-all "other" bucket without a per-iteration branch.
+_CATEGORIES = (
+    "controllers", "services", "models", "routes",
+    "middleware", "config", "tests", "migrations",
+)
+
+# Rendered READMEs per (analysis digest, repo name). README generation is a
+# pure function of the analysis result, so repeat renders are cache hits.
+_readme_cache = {}
+_README_CACHE_MAX = 64
 
 
 class ReadmeGenerator:
@@ -18,48 +36,83 @@ class ReadmeGenerator:
     def __init__(self, analysis_result: dict, repo_name: str = "Project"):
         self.result = analysis_result
         self.repo_name = repo_name
+        # Shared across several sections — computed once per instance
+        self._frameworks = analysis_result.get("framework", ["Unknown"])
+        self._frameworks_str = ", ".join(self._frameworks)
+        self._arch = analysis_result.get("architecture_type", "Unknown")
 
     def generate(self) -> str:
         """Generate complete README markdown."""
-        sections = [
-            self._header(),
-            self._description(),
-            self._tech_stack(),
-            self._architecture(),
-            self._folder_structure(),
-            self._installation(),
-            self._api_endpoints(),
-            self._features(),
-            self._database(),
-            self._license(),
-        ]
-        return "\n\n".join(filter(None, sections))
+        payload = json.dumps(self.result, sort_keys=True, default=str)
+        key = (
+            hashlib.blake2b(payload.encode(), digest_size=16).digest(),
+            self.repo_name,
+        )
+        cached = _readme_cache.get(key)
+        if cached is None:
+            cached = self._render()
+            if len(_readme_cache) >= _README_CACHE_MAX:
+                _readme_cache.clear()
+            _readme_cache[key] = cached
+        return cached
+
+    _SECTIONS = (
+        "_header",
+        "_description",
+        "_tech_stack",
+        "_architecture",
+        "_folder_structure",
+        "_installation",
+        "_api_endpoints",
+        "_features",
+        "_database",
+        "_license",
+    )
+
+    def write_to(self, fp) -> None:
+        """Stream the README section-by-section to a file-like sink.
+
+        Avoids holding all sections plus the joined copy in memory at once;
+        callers with a real file or response stream can pass it directly.
+        """
+        first = True
+        for name in self._SECTIONS:
+            section = getattr(self, name)()
+            if not section:
+                continue
+            if not first:
+                fp.write("\n\n")
+            fp.write(section)
+            first = False
+
+    def _render(self) -> str:
+        sio = io.StringIO()
+        self.write_to(sio)
+        return sio.getvalue()
 
     def _header(self) -> str:
-        frameworks = ", ".join(self.result.get("framework", ["Unknown"]))
         return f"""# {self.repo_name}
 
-> Built with {frameworks}
+> Built with {self._frameworks_str}
 
 ![Status](https://img.shields.io/badge/status-active-success.svg)
 ![Languages](https://img.shields.io/badge/languages-{len(self.result.get('languages', {}))}-blue.svg)
 """
 
     def _description(self) -> str:
-        arch = self.result.get("architecture_type", "Unknown")
         total_files = self.result.get("total_files", 0)
         total_lines = self.result.get("total_lines", 0)
 
         return f"""## 📋 Description
 
-This project follows a **{arch}** architecture pattern.
+This project follows a **{self._arch}** architecture pattern.
 
 | Metric | Value |
 |--------|-------|
 | Total Files | {total_files} |
 | Total Lines | {total_lines:,} |
-| Architecture | {arch} |
-| Frameworks | {', '.join(self.result.get('framework', ['Unknown']))} |
+| Architecture | {self._arch} |
+| Frameworks | {self._frameworks_str} |
 """
 
     def _tech_stack(self) -> str:
@@ -74,7 +127,6 @@ This project follows a **{arch}** architecture pattern.
 """
 
     def _architecture(self) -> str:
-        arch = self.result.get("architecture_type", "Unknown")
         components = self.result.get("components", {})
 
         comp_lines = []
@@ -87,7 +139,7 @@ This project follows a **{arch}** architecture pattern.
 
         return f"""## 🏗️ Architecture
 
-**Pattern**: {arch}
+**Pattern**: {self._arch}
 
 ### Components
 
@@ -96,10 +148,9 @@ This project follows a **{arch}** architecture pattern.
 
     def _folder_structure(self) -> str:
         tree = self.result.get("folder_structure", {})
-        if not tree:
+        if not tree or folder_tree_to_string is None:
             return ""
 
-        from engine.analyzer import folder_tree_to_string
         tree_str = folder_tree_to_string(tree, max_lines=40)
 
         return f"""## 📁 Folder Structure
@@ -111,7 +162,7 @@ This project follows a **{arch}** architecture pattern.
 """
 
     def _installation(self) -> str:
-        frameworks = self.result.get("framework", [])
+        frameworks = self._frameworks
         tech_stack = self.result.get("tech_stack", [])
 
         steps = [f"```bash", f"git clone <repository-url>", f"cd {self.repo_name}", "```"]
@@ -145,7 +196,7 @@ This project follows a **{arch}** architecture pattern.
         if entry_points:
             steps.append("")
             steps.append("### Running the Application")
-            for ep in entry_points[:3]:
+            for ep in islice(entry_points, 3):
                 f = ep.get("file", "")
                 reason = ep.get("reason", "")
                 if f.endswith(".py"):
@@ -160,14 +211,11 @@ This project follows a **{arch}** architecture pattern.
         if not endpoints:
             return ""
 
-        rows = []
-        for ep in endpoints[:30]:
-            method = ep.get("method", "GET")
-            route = ep.get("route", "")
-            file = ep.get("file", "")
-            rows.append(f"| `{method}` | `{route}` | `{file}` |")
-
-        table = "\n".join(rows)
+        # str.join over a generator builds the table in one C-level pass
+        table = "\n".join(
+            f"| `{ep.get('method', 'GET')}` | `{ep.get('route', '')}` | `{ep.get('file', '')}` |"
+            for ep in islice(endpoints, 30)
+        )
         return f"""## 🔌 API Endpoints
 
 | Method | Route | File |
@@ -227,6 +275,12 @@ class DocGenerator:
     def __init__(self, analysis_result: dict, repo_name: str = "Project"):
         self.result = analysis_result
         self.repo_name = repo_name
+        # One timestamp per generator instance — the doc/report/breakdown
+        # bundle generated together should carry the same "Generated" time
+        self._ts = datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")
+        # Shared across report sections — computed once per instance
+        self._frameworks_str = ", ".join(analysis_result.get("framework", ["Unknown"]))
+        self._arch = analysis_result.get("architecture_type", "Unknown")
 
     def generate_api_doc(self) -> str:
         """Generate API documentation."""
@@ -235,7 +289,7 @@ class DocGenerator:
             return f"# {self.repo_name} - API Documentation\n\nNo API endpoints detected."
 
         sections = [f"# {self.repo_name} - API Documentation\n"]
-        sections.append(f"**Generated**: {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}\n")
+        sections.append(f"**Generated**: {self._ts}\n")
         sections.append(f"**Total Endpoints**: {len(endpoints)}\n")
 
         # Group by file
@@ -245,117 +299,117 @@ class DocGenerator:
             by_file.setdefault(f, []).append(ep)
 
         for file, eps in by_file.items():
-            sections.append(f"\n## `{file}`\n")
-            for ep in eps:
-                method = ep.get("method", "GET")
-                route = ep.get("route", "")
-                sections.append(f"### {method} `{route}`\n")
-                sections.append(f"- **File**: `{file}`")
-                sections.append(f"- **Framework**: {ep.get('framework', 'Unknown')}")
-                sections.append("")
+            block = "\n".join(
+                f"### {ep.get('method', 'GET')} `{ep.get('route', '')}`\n\n"
+                f"- **File**: `{file}`\n"
+                f"- **Framework**: {ep.get('framework', 'Unknown')}\n"
+                for ep in eps
+            )
+            sections.append(f"\n## `{file}`\n\n{block}")
 
         return "\n".join(sections)
 
-    def generate_tech_report(self) -> str:
-        """Generate technical report."""
-        sections = [
-            f"# {self.repo_name} - Technical Report",
-            f"\n**Generated**: {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}",
-            "",
-            "## Executive Summary",
-            "",
-            f"This report provides a comprehensive technical analysis of the {self.repo_name} codebase.",
-            f"The project uses a **{self.result.get('architecture_type', 'Unknown')}** architecture"
-            f" built with **{', '.join(self.result.get('framework', ['Unknown']))}**.",
-            "",
-            "## Codebase Metrics",
-            "",
-            f"| Metric | Value |",
-            f"|--------|-------|",
-            f"| Total Files | {self.result.get('total_files', 0)} |",
-            f"| Total Lines | {self.result.get('total_lines', 0):,} |",
-            f"| Languages | {len(self.result.get('languages', {}))} |",
-            f"| API Endpoints | {len(self.result.get('api_endpoints', []))} |",
-            f"| Entry Points | {len(self.result.get('entry_points', []))} |",
-            "",
-            "## Language Breakdown",
-            "",
-        ]
+    def write_to(self, fp) -> None:
+        """Stream the technical report to a file-like sink.
+
+        Emits each block as it is produced instead of accumulating the full
+        report in memory; `generate_tech_report` wraps this for callers that
+        still want a string.
+        """
+        w = fp.write
+        w(
+            f"# {self.repo_name} - Technical Report\n"
+            f"\n**Generated**: {self._ts}\n"
+            "\n"
+            "## Executive Summary\n"
+            "\n"
+            f"This report provides a comprehensive technical analysis of the {self.repo_name} codebase.\n"
+            f"The project uses a **{self._arch}** architecture"
+            f" built with **{self._frameworks_str}**.\n"
+            "\n"
+            "## Codebase Metrics\n"
+            "\n"
+            "| Metric | Value |\n"
+            "|--------|-------|\n"
+            f"| Total Files | {self.result.get('total_files', 0)} |\n"
+            f"| Total Lines | {self.result.get('total_lines', 0):,} |\n"
+            f"| Languages | {len(self.result.get('languages', {}))} |\n"
+            f"| API Endpoints | {len(self.result.get('api_endpoints', []))} |\n"
+            f"| Entry Points | {len(self.result.get('entry_points', []))} |\n"
+            "\n"
+            "## Language Breakdown\n"
+            "\n"
+        )
 
         langs = self.result.get("languages", {})
         total = sum(langs.values()) or 1
         for lang, lines in sorted(langs.items(), key=lambda x: x[1], reverse=True):
             pct = (lines / total) * 100
-            sections.append(f"- **{lang}**: {lines:,} lines ({pct:.1f}%)")
-
-        sections.extend([
-            "",
-            "## Framework & Technology",
-            "",
-            f"- **Frameworks**: {', '.join(self.result.get('framework', ['Unknown']))}",
-            f"- **Tech Stack**: {', '.join(self.result.get('tech_stack', []))}",
-            f"- **Architecture**: {self.result.get('architecture_type', 'Unknown')}",
-            "",
-            "## Component Analysis",
-            "",
-        ])
+            w(f"- **{lang}**: {lines:,} lines ({pct:.1f}%)\n")
+
+        w(
+            "\n"
+            "## Framework & Technology\n"
+            "\n"
+            f"- **Frameworks**: {self._frameworks_str}\n"
+            f"- **Tech Stack**: {', '.join(self.result.get('tech_stack', []))}\n"
+            f"- **Architecture**: {self._arch}\n"
+            "\n"
+            "## Component Analysis\n"
+            "\n"
+        )
 
         components = self.result.get("components", {})
-        for cat, files in components.items():
-            if cat == "other":
+        for cat in _CATEGORIES:
+            files = components.get(cat)
+            if not files:
                 continue
-            sections.append(f"### {cat.title()} ({len(files)} files)")
-            for f in files[:10]:
-                sections.append(f"  - `{f}`")
+            w(f"### {cat.title()} ({len(files)} files)\n")
+            for f in islice(files, 10):
+                w(f"  - `{f}`\n")
             if len(files) > 10:
-                sections.append(f"  - ... and {len(files) - 10} more")
-            sections.append("")
+                w(f"  - ... and {len(files) - 10} more\n")
+            w("\n")
 
-        sections.extend([
-            "## Database Usage",
-            "",
-        ])
+        w("## Database Usage\n\n")
         for db in self.result.get("database_usage", []):
-            sections.append(f"- **{db['database']}** in `{db['file']}`")
+            w(f"- **{db['database']}** in `{db['file']}`\n")
 
-        sections.extend([
-            "",
-            "## Entry Points",
-            "",
-        ])
+        w("\n## Entry Points\n\n")
         for ep in self.result.get("entry_points", []):
-            sections.append(f"- `{ep['file']}` — {ep['reason']}")
+            w(f"- `{ep['file']}` — {ep['reason']}\n")
 
-        sections.extend([
-            "",
-            "---",
-            "*Generated by AI Codebase Analyzer*",
-        ])
+        w("\n---\n*Generated by AI Codebase Analyzer*")
 
-        return "\n".join(sections)
+    def generate_tech_report(self) -> str:
+        """Generate technical report."""
+        sio = io.StringIO()
+        self.write_to(sio)
+        return sio.getvalue()
 
     def generate_module_breakdown(self) -> str:
         """Generate module breakdown documentation."""
         sections = [
             f"# {self.repo_name} - Module Breakdown",
-            f"\n**Generated**: {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}",
+            f"\n**Generated**: {self._ts}",
             "",
         ]
 
         dep_graph = self.result.get("dependency_graph", {})
         components = self.result.get("components", {})
 
-        for cat, files in components.items():
-            if cat == "other" or not files:
+        for cat in _CATEGORIES:
+            files = components.get(cat)
+            if not files:
                 continue
             sections.append(f"## {cat.title()}")
             sections.append("")
-            for f in files[:20]:
+            for f in islice(files, 20):
                 sections.append(f"### `{f}`")
                 deps = dep_graph.get(f, [])
                 if deps:
                     sections.append("**Dependencies:**")
-                    for d in deps[:10]:
+                    for d in islice(deps, 10):
                         sections.append(f"  - `{d}`")
                 sections.append("")
 
@@ -0,0 +1,35 @@
+"""Executor helpers that keep background work off the gevent event loop.
+
+Under gevent's monkey-patching, threading.Thread becomes a greenlet, so
+a plain ThreadPoolExecutor would run minutes-long CPU-bound jobs
+(analysis, security scans, clones) on the event loop and starve every
+in-flight request on that worker. When the process is patched,
+BackgroundExecutor comes from gevent.threadpool and runs jobs on real
+OS threads; otherwise it is the stdlib executor unchanged.
+"""
+
+from concurrent.futures import ThreadPoolExecutor as _StdThreadPoolExecutor
+
+
+def _gevent_patched() -> bool:
+    try:
+        from gevent import monkey
+    except ImportError:  # pragma: no cover - gevent not installed (dev server)
+        return False
+    return monkey.is_module_patched("threading")
+
+
+if _gevent_patched():
+    from gevent.threadpool import ThreadPoolExecutor as BackgroundExecutor
+else:
+    BackgroundExecutor = _StdThreadPoolExecutor
+
+
+def process_pool_available() -> bool:
+    """Whether forking a ProcessPoolExecutor is safe in this process.
+
+    A fully monkey-patched process backs the pool's management threads
+    and multiprocessing locks with greenlets — a known deadlock hazard —
+    so callers fall back to their serial path instead.
+    """
+    return not _gevent_patched()
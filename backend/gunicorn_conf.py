@@ -0,0 +1,12 @@
+"""Gunicorn configuration.
+
+The API is I/O-bound — nearly every request is a Firestore or GitHub
+round trip — so gevent workers let each process carry many in-flight
+waits instead of one request per thread.
+"""
+
+bind = "0.0.0.0:5000"
+workers = 2
+worker_class = "gevent"
+worker_connections = 1000
+timeout = 180
@@ -1,13 +1,47 @@
 """Analysis routes."""
 
+import logging
+
 from flask import Blueprint, jsonify
 from middleware.auth_middleware import require_auth, get_current_uid
 from services.repo_service import get_repo, get_repo_path
 from services.firebase_service import update_document, log_analytics_event
 from engine.analyzer import CodebaseAnalyzer
+from executors import BackgroundExecutor
+
+logger = logging.getLogger(__name__)
 
 analysis_bp = Blueprint("analysis", __name__)
 
+# Analysis can pin a CPU for minutes; running it inside the request handler
+# would tie up a gunicorn worker for the duration. Requests hand the work to
+# this pool — real OS threads even under gevent, so the event loop never
+# carries it — and return 202 immediately; clients poll /status. (A
+# dedicated task queue would be the next step if analysis load outgrows one
+# process.)
+_analysis_pool = BackgroundExecutor(max_workers=4)
+
+
+def _run_analysis_bg(repo_id: str, uid: str, repo_path: str):
+    """Background worker: analyze the repo and record the final state."""
+    try:
+        analyzer = CodebaseAnalyzer(repo_path)
+        result = analyzer.analyze()
+
+        # Store results
+        update_document("repositories", repo_id, {
+            "status": "completed",
+            "analysis_result": result,
+        })
+
+        log_analytics_event("analysis", uid, repo_id, {
+            "framework": result.get("framework"),
+            "total_files": result.get("total_files"),
+        })
+    except Exception as e:
+        logger.error(f"Analysis failed for {repo_id}: {e}")
+        update_document("repositories", repo_id, {"status": "failed"})
+
 
 @analysis_bp.route("/<repo_id>", methods=["POST"])
 @require_auth
@@ -28,29 +62,12 @@ def start_analysis(repo_id):
     # Update status to analyzing
     update_document("repositories", repo_id, {"status": "analyzing"})
 
-    try:
-        analyzer = CodebaseAnalyzer(repo_path)
-        result = analyzer.analyze()
-
-        # Store results
-        update_document("repositories", repo_id, {
-            "status": "completed",
-            "analysis_result": result,
-        })
-
-        log_analytics_event("analysis", uid, repo_id, {
-            "framework": result.get("framework"),
-            "total_files": result.get("total_files"),
-        })
-
-        return jsonify({
-            "status": "completed",
-            "analysis": result,
-        }), 200
+    _analysis_pool.submit(_run_analysis_bg, repo_id, uid, repo_path)
 
-    except Exception as e:
-        update_document("repositories", repo_id, {"status": "failed"})
-        return jsonify({"error": f"Analysis failed: {str(e)}"}), 500
+    return jsonify({
+        "status": "analyzing",
+        "repo_id": repo_id,
+    }), 202
 
 
 @analysis_bp.route("/<repo_id>", methods=["GET"])
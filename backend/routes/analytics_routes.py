@@ -4,6 +4,7 @@ from flask import Blueprint, request, jsonify
 from middleware.auth_middleware import require_auth, require_role, get_current_uid, get_current_user
 from services.firebase_service import query_collection, get_db
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 analytics_bp = Blueprint("analytics", __name__)
 
@@ -25,8 +26,26 @@ def dashboard_stats():
         "recent_activity": [],
     }
 
-    # Count user's repos
-    repos = query_collection("repositories", filters=[("owner_uid", "==", uid)], limit=500)
+    # The four collection queries are independent Firestore round trips;
+    # run them concurrently so the endpoint pays max() latency, not sum()
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        f_repos = ex.submit(
+            query_collection, "repositories",
+            filters=[("owner_uid", "==", uid)], limit=500)
+        f_docs = ex.submit(
+            query_collection, "documents",
+            filters=[("owner_uid", "==", uid)], limit=500)
+        f_diagrams = ex.submit(
+            query_collection, "diagrams",
+            filters=[("owner_uid", "==", uid)], limit=500)
+        f_events = ex.submit(
+            query_collection, "analytics",
+            filters=[("user_uid", "==", uid)], limit=20)
+        repos = f_repos.result()
+        docs = f_docs.result()
+        diagrams = f_diagrams.result()
+        events = f_events.result()
+
     stats["projects_analyzed"] = len([r for r in repos if r.get("status") == "completed"])
     stats["total_repos"] = len(repos)
 
@@ -35,20 +54,8 @@ def dashboard_stats():
         scan = repo.get("security_scan") or {}
         stats["security_issues_found"] += scan.get("total_issues", 0)
 
-    # Count documents
-    docs = query_collection("documents", filters=[("owner_uid", "==", uid)], limit=500)
     stats["documents_generated"] = len(docs)
-
-    # Count diagrams
-    diagrams = query_collection("diagrams", filters=[("owner_uid", "==", uid)], limit=500)
     stats["diagrams_generated"] = len(diagrams)
-
-    # Recent analytics events
-    events = query_collection(
-        "analytics",
-        filters=[("user_uid", "==", uid)],
-        limit=20,
-    )
     stats["recent_activity"] = events[:20]
 
     # Monthly breakdown (from repos)
@@ -71,7 +78,16 @@ def dashboard_stats():
 @require_role("faculty", "hod")
 def user_stats(target_uid):
     """Get analytics for a specific user (faculty/HOD only)."""
-    repos = query_collection("repositories", filters=[("owner_uid", "==", target_uid)], limit=500)
+    # Same pattern as dashboard_stats: overlap the independent round trips
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        f_repos = ex.submit(
+            query_collection, "repositories",
+            filters=[("owner_uid", "==", target_uid)], limit=500)
+        f_docs = ex.submit(
+            query_collection, "documents",
+            filters=[("owner_uid", "==", target_uid)], limit=500)
+        repos = f_repos.result()
+        docs = f_docs.result()
 
     stats = {
         "total_repos": len(repos),
@@ -79,9 +95,7 @@ def user_stats(target_uid):
         "total_security_issues": sum(
             (r.get("security_scan") or {}).get("total_issues", 0) for r in repos
         ),
+        "total_documents": len(docs),
     }
 
-    docs = query_collection("documents", filters=[("owner_uid", "==", target_uid)], limit=500)
-    stats["total_documents"] = len(docs)
-
     return jsonify(stats), 200
@@ -35,6 +35,9 @@ def register():
     user_data = {
         "username": data["username"],
         "email": data["email"],
+        # Normalized copy so email lookups can use an indexed equality
+        # filter instead of scanning the collection
+        "email_lower": data["email"].strip().lower(),
         "role": role,
         "github_link": data.get("github_link", ""),
         "department": data.get("department", ""),
@@ -1,5 +1,8 @@
 """Chatbot routes."""
 
+import time
+from collections import OrderedDict
+
 from flask import Blueprint, request, jsonify
 from middleware.auth_middleware import require_auth, get_current_uid
 from services.repo_service import get_repo
@@ -8,8 +11,12 @@ from services.firebase_service import log_analytics_event
 
 chat_bp = Blueprint("chat", __name__)
 
-# Cache chatbot instances per repo
-_chatbot_cache = {}
+# Cache chatbot instances per repo — bounded LRU so memory scales with
+# concurrent repos, not lifetime chat traffic. Entries are (created, bot)
+# and expire after the TTL so re-analyzed repos get a fresh bot.
+_chatbot_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_CHATBOT_CACHE_MAX = 32
+_CHATBOT_CACHE_TTL = 600  # seconds
 
 
 @chat_bp.route("/<repo_id>", methods=["POST"])
@@ -32,10 +39,16 @@ def chat_with_repo(repo_id):
         return jsonify({"error": "message field required"}), 400
 
     # Get or create chatbot instance
-    if repo_id not in _chatbot_cache:
-        _chatbot_cache[repo_id] = ChatbotService(analysis, repo.get("name", "Project"))
-
-    chatbot = _chatbot_cache[repo_id]
+    now = time.monotonic()
+    entry = _chatbot_cache.get(repo_id)
+    if entry is None or now - entry[0] > _CHATBOT_CACHE_TTL:
+        chatbot = ChatbotService(analysis, repo.get("name", "Project"))
+        _chatbot_cache[repo_id] = (now, chatbot)
+        if len(_chatbot_cache) > _CHATBOT_CACHE_MAX:
+            _chatbot_cache.popitem(last=False)
+    else:
+        chatbot = entry[1]
+        _chatbot_cache.move_to_end(repo_id)
     response = chatbot.chat(message)
 
     log_analytics_event("chat", uid, repo_id, {"message_length": len(message)})
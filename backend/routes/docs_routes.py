@@ -1,5 +1,9 @@
 """Documentation generation routes."""
 
+import re
+from itertools import groupby
+from operator import itemgetter
+
 from flask import Blueprint, request, jsonify
 from middleware.auth_middleware import require_auth, get_current_uid
 from services.repo_service import get_repo
@@ -11,6 +15,30 @@ from engine.doc_generator import ReadmeGenerator, DocGenerator
 
 docs_bp = Blueprint("docs", __name__)
 
+# PDF export: font states for the markdown → text conversion, and one
+# compiled regex that classifies a line in a single match instead of a
+# chain of startswith/endswith probes per line.
+_FONT_H1 = ("Helvetica", "B", 16)
+_FONT_H2 = ("Helvetica", "B", 14)
+_FONT_BOLD = ("Helvetica", "B", 11)
+_FONT_BODY = ("Helvetica", "", 10)
+
+_MD_LINE = re.compile(r"^(?:(?P<h1># )|(?P<h2>## )|(?P<bold>\*\*.+\*\*$))")
+
+
+def _classify_line(line: str):
+    """Map a markdown line to its (font, text) pair for PDF rendering."""
+    line = line.strip()
+    m = _MD_LINE.match(line)
+    if m is None:
+        return _FONT_BODY, line.replace("#", "").strip()
+    kind = m.lastgroup
+    if kind == "h1":
+        return _FONT_H1, line[2:]
+    if kind == "h2":
+        return _FONT_H2, line[3:]
+    return _FONT_BOLD, line[2:-2]
+
 
 @docs_bp.route("/<repo_id>/readme", methods=["POST"])
 @require_auth
@@ -182,24 +210,14 @@ def export_doc(doc_id, fmt):
             pdf = FPDF()
             pdf.add_page()
             pdf.set_auto_page_break(auto=True, margin=15)
-            pdf.set_font("Helvetica", size=10)
-
-            for line in content.split("\n"):
-                # Basic markdown → text conversion
-                line = line.replace("#", "").strip()
-                if line.startswith("**") and line.endswith("**"):
-                    pdf.set_font("Helvetica", "B", 11)
-                    line = line[2:-2]
-                elif line.startswith("# "):
-                    pdf.set_font("Helvetica", "B", 16)
-                    line = line[2:]
-                elif line.startswith("## "):
-                    pdf.set_font("Helvetica", "B", 14)
-                    line = line[3:]
-                else:
-                    pdf.set_font("Helvetica", size=10)
-
-                pdf.multi_cell(0, 5, line)
+
+            # Classify every line once, then emit runs of equal font state:
+            # set_font fires once per run instead of once per line
+            classified = [_classify_line(l) for l in content.split("\n")]
+            for font, run in groupby(classified, key=itemgetter(0)):
+                pdf.set_font(*font)
+                for _, text in run:
+                    pdf.multi_cell(0, 5, text)
 
             pdf_bytes = pdf.output()
             return pdf_bytes, 200, {
@@ -1,16 +1,29 @@
 """Faculty management routes."""
 
+import time
+from collections import OrderedDict
+
 from flask import Blueprint, request, jsonify
 from middleware.auth_middleware import require_auth, require_role, get_current_uid
 from services.firebase_service import (
     add_document, get_document, update_document,
-    query_collection, log_analytics_event, get_user_doc
+    query_collection, log_analytics_event, get_user_doc, batch_get_users,
+    array_union, array_union_many, array_remove, field_path
 )
 from services.repo_service import get_repo
+from schemas import decode_score_student
 from datetime import datetime
 
 faculty_bp = Blueprint("faculty", __name__)
 
+# email → (resolved_at, uid, email) for _resolve_uid. An email's UID never
+# changes once assigned, so only successful resolutions are cached; bulk
+# imports of the same class roster resolve each student once. Same bounded
+# LRU shape as the chatbot cache in chat_routes.
+_resolve_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_RESOLVE_CACHE_MAX = 2048
+_RESOLVE_CACHE_TTL = 300  # seconds
+
 
 # ── helper ──────────────────────────────────────────────
 def _resolve_uid(identifier):
@@ -20,13 +33,34 @@ def _resolve_uid(identifier):
     if not identifier:
         return None, None
 
-    # If it looks like an email, search users collection
+    # If it looks like an email, use the indexed equality filter on the
+    # normalized email field — one document read instead of fetching the
+    # whole users collection and filtering client-side
     if "@" in identifier:
-        users = query_collection("users", limit=5000)
-        for u in users:
-            if u.get("email", "").lower() == identifier.lower():
-                return u.get("uid") or u.get("id"), u.get("email")
-        return None, None
+        email = identifier.lower()
+        now = time.monotonic()
+        entry = _resolve_cache.get(email)
+        if entry is not None and now - entry[0] <= _RESOLVE_CACHE_TTL:
+            _resolve_cache.move_to_end(email)
+            return entry[1], entry[2]
+        matches = query_collection(
+            "users", filters=[("email_lower", "==", email)], limit=1)
+        u = matches[0] if matches else None
+        if u is None:
+            # Legacy docs created before email_lower existed: fall back
+            # to the old collection scan
+            for cand in query_collection("users", limit=5000):
+                if cand.get("email", "").lower() == email:
+                    u = cand
+                    break
+        if u is None:
+            return None, None
+        resolved_uid = u.get("uid") or u.get("id")
+        _resolve_cache[email] = (now, resolved_uid, u.get("email"))
+        _resolve_cache.move_to_end(email)
+        if len(_resolve_cache) > _RESOLVE_CACHE_MAX:
+            _resolve_cache.popitem(last=False)
+        return resolved_uid, u.get("email")
 
     # Otherwise treat as UID directly; verify it exists
     from services.firebase_service import get_user_doc
@@ -36,6 +70,17 @@ def _resolve_uid(identifier):
     return identifier, ""   # allow even if doc missing – auth UID may exist
 
 
+def _student_entry(resolved_uid, email):
+    """Denormalized {uid, email, name} entry stored on the project doc."""
+    user = get_user_doc(resolved_uid)
+    if user:
+        email = email or user.get("email", "")
+        name = user.get("username") or email
+    else:
+        name = email
+    return {"uid": resolved_uid, "email": email, "name": name or resolved_uid}
+
+
 @faculty_bp.route("/projects", methods=["POST"])
 @require_auth
 @require_role("faculty", "hod")
@@ -53,6 +98,7 @@ def create_project():
         "description": data.get("description", ""),
         "deadline": data.get("deadline", ""),
         "student_uids": [],
+        "students": [],          # denormalized [{uid, email, name}]
         "submissions": {},       # {student_uid: {github_url, submitted_at}}
         "student_marks": {},     # {student_uid: {marks, comments}}
         "status": "active",
@@ -76,18 +122,32 @@ def list_projects():
         limit=100,
     )
 
-    # Enrich each project with student info
+    # The denormalized `students` entries written at assignment time
+    # cover display fields with zero extra reads; only UIDs assigned
+    # before the field existed still need the batched user lookup.
+    legacy_uids = set()
+    for p in projects:
+        known = {s.get("uid") for s in p.get("students") or []}
+        legacy_uids.update(
+            s_uid for s_uid in p.get("student_uids", []) if s_uid not in known)
+    users_map = batch_get_users(legacy_uids)
+
     for p in projects:
+        entries = {s.get("uid"): s for s in p.get("students") or []}
         enriched_students = []
         for s_uid in p.get("student_uids", []):
-            from services.firebase_service import get_user_doc
-            u = get_user_doc(s_uid)
+            entry = entries.get(s_uid)
+            if entry is None:
+                u = users_map.get(s_uid)
+                entry = {
+                    "uid": s_uid,
+                    "email": u.get("email", "") if u else "",
+                    "name": u.get("username", u.get("email", "")) if u else s_uid,
+                }
             sub = (p.get("submissions") or {}).get(s_uid)
             marks_info = (p.get("student_marks") or {}).get(s_uid)
             enriched_students.append({
-                "uid": s_uid,
-                "email": u.get("email", "") if u else "",
-                "name": u.get("username", u.get("email", "")) if u else s_uid,
+                **entry,
                 "submission": sub,
                 "marks": marks_info.get("marks") if marks_info else None,
                 "comments": marks_info.get("comments", "") if marks_info else "",
@@ -113,29 +173,40 @@ def get_project(project_id):
 def score_project(project_id):
     """Give marks to a specific student's submission (out of 100)."""
     uid = get_current_uid()
-    project = get_document("projects", project_id)
+    # Only the fields the checks below need — skips shipping the
+    # submissions/marks maps
+    project = get_document("projects", project_id,
+                           fields=["faculty_uid", "student_uids"])
 
     if not project:
         return jsonify({"error": "Project not found"}), 404
     if project.get("faculty_uid") != uid:
         return jsonify({"error": "Access denied"}), 403
 
-    data = request.get_json()
-    student_uid = data.get("student_uid", "").strip()
-    marks = data.get("marks")
-    comments = data.get("comments", "")
+    # Schema decode replaces the per-field isinstance/range chain
+    try:
+        payload = decode_score_student(request.get_data())
+    except ValueError as e:
+        return jsonify({"error": f"Invalid payload: {e}"}), 400
+
+    student_uid = payload.student_uid.strip()
+    marks = payload.marks
+    comments = payload.comments
 
     if not student_uid:
         return jsonify({"error": "student_uid is required"}), 400
-    if student_uid not in project.get("student_uids", []):
+    if student_uid not in set(project.get("student_uids", ())):
         return jsonify({"error": "Student not assigned to this project"}), 400
-    if marks is None or not isinstance(marks, (int, float)) or marks < 0 or marks > 100:
-        return jsonify({"error": "marks must be a number 0-100"}), 400
-
-    student_marks = project.get("student_marks") or {}
-    student_marks[student_uid] = {"marks": marks, "comments": comments}
 
-    update_document("projects", project_id, {"student_marks": student_marks})
+    # Map-entry update writes just this student's entry server-side —
+    # concurrent scoring of different students can't overwrite each
+    # other. field_path() escapes the key: UIDs can start with a digit
+    # and legacy entries can be emails, which a dotted string rejects.
+    update_document("projects", project_id, {
+        field_path("student_marks", student_uid): {
+            "marks": marks, "comments": comments,
+        },
+    })
     log_analytics_event("project_scored", uid,
                         metadata={"project_id": project_id, "student_uid": student_uid, "marks": marks})
 
@@ -156,18 +227,66 @@ def add_student_to_project(project_id):
     if not resolved_uid:
         return jsonify({"error": f"No user found for '{identifier}'"}), 404
 
-    project = get_document("projects", project_id)
+    # Existence check only — one field instead of the whole project
+    project = get_document("projects", project_id, fields=["faculty_uid"])
     if not project:
         return jsonify({"error": "Project not found"}), 404
 
-    students = project.get("student_uids", [])
-    if resolved_uid not in students:
-        students.append(resolved_uid)
-        update_document("projects", project_id, {"student_uids": students})
+    # ArrayUnion merges server-side: no read-modify-write, and concurrent
+    # adds of different students both land. The denormalized entry keeps
+    # list_projects from re-fetching user docs just to render a name.
+    array_union_many("projects", project_id, {
+        "student_uids": [resolved_uid],
+        "students": [_student_entry(resolved_uid, email)],
+    })
 
     return jsonify({"message": f"Student added ({email or resolved_uid})"}), 200
 
 
+@faculty_bp.route("/projects/<project_id>/add-students", methods=["POST"])
+@require_auth
+@require_role("faculty", "hod")
+def add_students_to_project(project_id):
+    """Add several students to a project in one call (emails or UIDs).
+
+    One ArrayUnion write covers the whole roster instead of a request
+    per student, so class imports cost a single round trip.
+    """
+    data = request.get_json() or {}
+    identifiers = data.get("identifiers")
+    if not identifiers or not isinstance(identifiers, list):
+        return jsonify({"error": "identifiers list required"}), 400
+
+    project = get_document("projects", project_id, fields=["faculty_uid"])
+    if not project:
+        return jsonify({"error": "Project not found"}), 404
+
+    added = []
+    unresolved = []
+    uids = []
+    for identifier in identifiers:
+        resolved_uid, email = _resolve_uid(str(identifier))
+        if resolved_uid:
+            uids.append(resolved_uid)
+            added.append({"uid": resolved_uid, "email": email})
+        else:
+            unresolved.append(identifier)
+
+    if uids:
+        unique = list(dict.fromkeys(uids))
+        emails = {s["uid"]: s["email"] for s in added}
+        array_union_many("projects", project_id, {
+            "student_uids": unique,
+            "students": [_student_entry(u, emails.get(u, "")) for u in unique],
+        })
+        log_analytics_event("students_added", get_current_uid(), metadata={
+            "project_id": project_id,
+            "count": len(uids),
+        })
+
+    return jsonify({"added": added, "unresolved": unresolved}), 200
+
+
 @faculty_bp.route("/projects/<project_id>/add-repo", methods=["POST"])
 @require_auth
 @require_role("faculty", "hod")
@@ -178,14 +297,11 @@ def add_repo_to_project(project_id):
     if not repo_id:
         return jsonify({"error": "repo_id required"}), 400
 
-    project = get_document("projects", project_id)
+    project = get_document("projects", project_id, fields=["faculty_uid"])
     if not project:
         return jsonify({"error": "Project not found"}), 404
 
-    repos = project.get("repo_ids", [])
-    if repo_id not in repos:
-        repos.append(repo_id)
-        update_document("projects", project_id, {"repo_ids": repos})
+    array_union("projects", project_id, "repo_ids", [repo_id])
 
     return jsonify({"message": "Repository added"}), 200
 
@@ -194,18 +310,22 @@ def add_repo_to_project(project_id):
 @require_auth
 @require_role("faculty", "hod")
 def list_students():
-    """List students (optionally filtered by department)."""
+    """List students (optionally filtered by department, cursor-paginated)."""
     dept = request.args.get("department", "")
 
     filters = [("role", "==", "student")]
     if dept:
         filters.append(("department", "==", dept))
 
-    students = query_collection("users", filters=filters, limit=200)
-    for s in students:
-        s.pop("mentor_id", None)
-
-    return jsonify({"students": students}), 200
+    page_size = min(request.args.get("page_size", 200, type=int), 500)
+    cursor = request.args.get("cursor") or None
+    # Server-side projection replaces the old mentor_id pop loop: the
+    # withheld field is simply never transferred
+    students = query_collection(
+        "users", filters=filters, limit=page_size, start_after=cursor,
+        fields=["email", "username", "role", "department", "github_link"])
+    next_cursor = students[-1]["id"] if len(students) == page_size else None
+    return jsonify({"students": students, "next_cursor": next_cursor}), 200
 
 
 # =========================================================
@@ -220,12 +340,46 @@ def student_my_projects():
     user = get_user_doc(uid)
     user_email = (user.get("email", "") if user else "").lower()
 
-    all_projects = query_collection("projects", limit=500)
-    # Match by UID or email (handles old projects that stored email instead of UID)
-    my_projects = []
-    for p in all_projects:
-        s_uids = p.get("student_uids", [])
-        if uid in s_uids or (user_email and user_email in [s.lower() for s in s_uids]):
+    # Indexed array_contains queries return just this student's projects
+    # instead of fetching the whole collection and filtering in Python.
+    # Legacy projects may still hold the student's email in student_uids,
+    # so that key is queried too; matches are migrated to the UID as they
+    # are seen so the email path dies out.
+    my_projects = query_collection(
+        "projects",
+        filters=[("student_uids", "array_contains", uid)],
+        limit=100,
+    )
+    if user_email:
+        seen = {p["id"] for p in my_projects}
+        legacy = query_collection(
+            "projects",
+            filters=[("student_uids", "array_contains", user_email)],
+            limit=100,
+        )
+        for p in legacy:
+            if p["id"] in seen:
+                continue
+            # Migrate with array transforms, not a whole-array rewrite: a
+            # read-modify-write here could drop a concurrent ArrayUnion
+            # add. Union the UID first, then remove the email entries — a
+            # crash in between only leaves a duplicate that the next
+            # visit cleans up, never a lost membership.
+            s_uids = p.get("student_uids", [])
+            emails = [s for s in s_uids if s.lower() == user_email]
+            array_union("projects", p["id"], "student_uids", [uid])
+            if emails:
+                array_remove("projects", p["id"], "student_uids", emails)
+            # Denormalized display entries still keyed by the email move
+            # over the same way
+            stale = [s for s in p.get("students") or []
+                     if (s.get("uid") or "").lower() == user_email]
+            if stale:
+                array_union("projects", p["id"], "students",
+                            [{**entry, "uid": uid} for entry in stale])
+                array_remove("projects", p["id"], "students", stale)
+            p["student_uids"] = [uid] + [s for s in s_uids
+                                         if s.lower() != user_email]
             my_projects.append(p)
 
     # Flatten per-student marks & submission into top-level for convenience
@@ -250,15 +404,14 @@ def student_my_projects():
 def submit_project(project_id):
     """Student submits a GitHub URL for an assigned project."""
     uid = get_current_uid()
-    project = get_document("projects", project_id)
+    project = get_document("projects", project_id, fields=["student_uids"])
 
     if not project:
         return jsonify({"error": "Project not found"}), 404
-    s_uids = project.get("student_uids", [])
-    from services.firebase_service import get_user_doc as _get_user
-    _user = _get_user(uid)
+    s_uids = frozenset(project.get("student_uids", ()))
+    _user = get_user_doc(uid)
     _email = (_user.get("email", "") if _user else "").lower()
-    if uid not in s_uids and _email not in [s.lower() for s in s_uids]:
+    if uid not in s_uids and _email not in {s.lower() for s in s_uids}:
         return jsonify({"error": "You are not assigned to this project"}), 403
 
     data = request.get_json() or {}
@@ -266,11 +419,13 @@ def submit_project(project_id):
     if not github_url:
         return jsonify({"error": "github_url required"}), 400
 
-    submissions = project.get("submissions") or {}
-    submissions[uid] = {
-        "github_url": github_url,
-        "submitted_at": datetime.utcnow().isoformat(),
-    }
-    update_document("projects", project_id, {"submissions": submissions})
+    # Map-entry update: only this student's submission entry is written;
+    # field_path() keeps digit-leading UIDs from breaking the key parser
+    update_document("projects", project_id, {
+        field_path("submissions", uid): {
+            "github_url": github_url,
+            "submitted_at": datetime.utcnow().isoformat(),
+        },
+    })
 
     return jsonify({"message": "Submission recorded", "github_url": github_url}), 200
@@ -1,11 +1,15 @@
 """HOD management routes."""
 
+from concurrent.futures import ThreadPoolExecutor
+
 from flask import Blueprint, request, jsonify
 from middleware.auth_middleware import require_auth, require_role, get_current_uid
 from services.firebase_service import (
     add_document, get_document, update_document,
-    query_collection, log_analytics_event, get_user_doc
+    query_collection, log_analytics_event, get_user_doc,
+    aggregate_count, aggregate_sum, commit_batch
 )
+from schemas import decode_score_faculty, decode_assign_mentor
 
 hod_bp = Blueprint("hod", __name__)
 
@@ -14,28 +18,38 @@ hod_bp = Blueprint("hod", __name__)
 @require_auth
 @require_role("hod")
 def list_faculty():
-    """List all faculty members."""
+    """List all faculty members (cursor-paginated)."""
     dept = request.args.get("department", "")
     filters = [("role", "==", "faculty")]
     if dept:
         filters.append(("department", "==", dept))
 
-    faculty = query_collection("users", filters=filters, limit=200)
-    return jsonify({"faculty": faculty}), 200
+    page_size = min(request.args.get("page_size", 200, type=int), 500)
+    cursor = request.args.get("cursor") or None
+    faculty = query_collection(
+        "users", filters=filters, limit=page_size, start_after=cursor)
+    next_cursor = faculty[-1]["id"] if len(faculty) == page_size else None
+    return jsonify({"faculty": faculty, "next_cursor": next_cursor}), 200
 
 
 @hod_bp.route("/students", methods=["GET"])
 @require_auth
 @require_role("hod")
 def list_all_students():
-    """List all students."""
+    """List all students (cursor-paginated)."""
     dept = request.args.get("department", "")
     filters = [("role", "==", "student")]
     if dept:
         filters.append(("department", "==", dept))
 
-    students = query_collection("users", filters=filters, limit=500)
-    return jsonify({"students": students}), 200
+    page_size = min(request.args.get("page_size", 500, type=int), 500)
+    cursor = request.args.get("cursor") or None
+    students = query_collection(
+        "users", filters=filters, limit=page_size, start_after=cursor,
+        fields=["email", "username", "role", "department", "github_link",
+                "mentor_id"])
+    next_cursor = students[-1]["id"] if len(students) == page_size else None
+    return jsonify({"students": students, "next_cursor": next_cursor}), 200
 
 
 @hod_bp.route("/assign-mentor", methods=["POST"])
@@ -44,10 +58,13 @@ def list_all_students():
 def assign_mentor():
     """Assign a faculty mentor to a student."""
     uid = get_current_uid()
-    data = request.get_json()
+    try:
+        payload = decode_assign_mentor(request.get_data())
+    except ValueError as e:
+        return jsonify({"error": f"Invalid payload: {e}"}), 400
 
-    faculty_uid = data.get("faculty_uid")
-    student_uid = data.get("student_uid")
+    faculty_uid = payload.faculty_uid
+    student_uid = payload.student_uid
 
     if not faculty_uid or not student_uid:
         return jsonify({"error": "faculty_uid and student_uid required"}), 400
@@ -61,16 +78,18 @@ def assign_mentor():
     if not student or student.get("role") != "student":
         return jsonify({"error": "Invalid student UID"}), 404
 
-    # Update student's mentor
-    update_document("users", student_uid, {"mentor_id": faculty_uid})
-
-    # Create assignment record
-    assignment_id = add_document("mentor_assignments", {
-        "hod_uid": uid,
-        "faculty_uid": faculty_uid,
-        "student_uid": student_uid,
-        "department": student.get("department", ""),
-    })
+    # Mentor update + assignment record commit as one atomic batch —
+    # a single round trip, and neither write can land without the other
+    ids = commit_batch([
+        ("update", "users", student_uid, {"mentor_id": faculty_uid}),
+        ("add", "mentor_assignments", None, {
+            "hod_uid": uid,
+            "faculty_uid": faculty_uid,
+            "student_uid": student_uid,
+            "department": student.get("department", ""),
+        }),
+    ])
+    assignment_id = ids[1] if ids else None
 
     log_analytics_event("mentor_assigned", uid, metadata={
         "faculty_uid": faculty_uid,
@@ -94,12 +113,13 @@ def score_faculty(faculty_uid):
     if not faculty or faculty.get("role") != "faculty":
         return jsonify({"error": "Faculty not found"}), 404
 
-    data = request.get_json()
-    score = data.get("score")
-    feedback = data.get("feedback", "")
+    try:
+        payload = decode_score_faculty(request.get_data())
+    except ValueError as e:
+        return jsonify({"error": f"Invalid payload: {e}"}), 400
 
-    if score is None or not isinstance(score, (int, float)) or score < 0 or score > 10:
-        return jsonify({"error": "score must be a number 0-10"}), 400
+    score = payload.score
+    feedback = payload.feedback
 
     # Store score as a document
     score_id = add_document("faculty_scores", {
@@ -114,6 +134,36 @@ def score_faculty(faculty_uid):
     return jsonify({"message": "Faculty scored", "score_id": score_id}), 201
 
 
+def _legacy_dept_repos(dept):
+    """Find repos created before the denormalized department field.
+
+    Firestore cannot query for a missing field, so this scans a
+    projection of the collection, matches the field-less docs against
+    the department's users by owner, and backfills ``department`` on
+    each match so the indexed filter finds the doc next time — the same
+    migrate-as-seen approach the faculty routes use for legacy email
+    entries. Returns the matched repos (projected fields only).
+    """
+    scan = query_collection(
+        "repositories", limit=500,
+        fields=["department", "owner_uid", "status",
+                "security_scan.total_issues"])
+    missing = [r for r in scan if "department" not in r]
+    if not missing:
+        return []
+    dept_users = query_collection(
+        "users", filters=[("department", "==", dept)], limit=500,
+        fields=["department"])
+    dept_uids = {u["id"] for u in dept_users}
+    matched = []
+    for r in missing:
+        if r.get("owner_uid") in dept_uids:
+            update_document("repositories", r["id"], {"department": dept})
+            r["department"] = dept
+            matched.append(r)
+    return matched
+
+
 @hod_bp.route("/repositories", methods=["GET"])
 @require_auth
 @require_role("hod")
@@ -121,14 +171,20 @@ def list_all_repos():
     """List all repositories (HOD can see everything)."""
     dept = request.args.get("department", "")
 
-    # Get all repos
-    repos = query_collection("repositories", limit=500)
-
-    # Optionally filter by department (via user lookup)
     if dept:
-        dept_users = query_collection("users", filters=[("department", "==", dept)], limit=500)
-        dept_uids = {u.get("uid") or u.get("id") for u in dept_users}
-        repos = [r for r in repos if r.get("owner_uid") in dept_uids]
+        # Repos store the owner's department at create time, so the
+        # filter runs server-side with no user-lookup pass
+        repos = query_collection(
+            "repositories", filters=[("department", "==", dept)], limit=500)
+        # Legacy repos created before the denormalized field are
+        # invisible to the indexed filter — migrate them as seen and
+        # merge them into the response
+        for legacy in _legacy_dept_repos(dept):
+            doc = get_document("repositories", legacy["id"])
+            if doc:
+                repos.append(doc)
+    else:
+        repos = query_collection("repositories", limit=500)
 
     return jsonify({"repositories": repos}), 200
 
@@ -140,26 +196,72 @@ def department_analytics():
     """Get department-wide analytics."""
     dept = request.args.get("department", "")
 
-    # Count users by role
-    students = query_collection("users", filters=[("role", "==", "student")], limit=500)
-    faculty = query_collection("users", filters=[("role", "==", "faculty")], limit=500)
-
+    # Department filtering happens in the query itself — Firestore's index
+    # returns only the matching docs instead of shipping 500 and
+    # discarding most of them here
+    student_filters = [("role", "==", "student")]
+    faculty_filters = [("role", "==", "faculty")]
     if dept:
-        students = [s for s in students if s.get("department") == dept]
-        faculty = [f for f in faculty if f.get("department") == dept]
-
-    all_repos = query_collection("repositories", limit=1000)
-    all_user_uids = {s.get("uid") or s.get("id") for s in students + faculty}
-    dept_repos = [r for r in all_repos if r.get("owner_uid") in all_user_uids] if dept else all_repos
+        student_filters.append(("department", "==", dept))
+        faculty_filters.append(("department", "==", dept))
+
+    repo_filters = [("department", "==", dept)] if dept else []
+
+    # Counts and the issue total come back as single aggregation results
+    # instead of up to 1000 repo documents; the independent round trips
+    # are overlapped so the endpoint pays for the slowest one, not the
+    # sum (same pattern as analytics_routes.dashboard_stats)
+    with ThreadPoolExecutor(max_workers=5) as ex:
+        f_students = ex.submit(
+            query_collection, "users", filters=student_filters, limit=500)
+        f_faculty = ex.submit(
+            query_collection, "users", filters=faculty_filters, limit=500)
+        f_total = ex.submit(aggregate_count, "repositories", repo_filters)
+        f_analyzed = ex.submit(
+            aggregate_count, "repositories",
+            repo_filters + [("status", "==", "completed")])
+        f_issues = ex.submit(
+            aggregate_sum, "repositories", "security_scan.total_issues",
+            repo_filters)
+        students = f_students.result()
+        faculty = f_faculty.result()
+        total_repos = f_total.result()
+        analyzed_repos = f_analyzed.result()
+        total_issues = f_issues.result()
+
+    if total_repos is None or analyzed_repos is None or total_issues is None:
+        # Aggregation unavailable: fall back to fetching repos and
+        # reducing client-side, scoped by owner so legacy docs without
+        # the denormalized department field still count
+        all_repos = query_collection("repositories", limit=1000)
+        if dept:
+            all_user_uids = {s.get("uid") or s.get("id") for s in students + faculty}
+            dept_repos = [r for r in all_repos if r.get("owner_uid") in all_user_uids]
+        else:
+            dept_repos = all_repos
+        total_repos = len(dept_repos)
+        analyzed_repos = len([r for r in dept_repos if r.get("status") == "completed"])
+        total_issues = sum(
+            (r.get("security_scan") or {}).get("total_issues", 0) for r in dept_repos
+        )
+    elif dept:
+        # The aggregations only see docs carrying the denormalized
+        # field; fold in legacy repos, backfilling them so later
+        # requests stay on the pure-aggregation path
+        legacy = _legacy_dept_repos(dept)
+        total_repos += len(legacy)
+        analyzed_repos += len(
+            [r for r in legacy if r.get("status") == "completed"])
+        total_issues += sum(
+            (r.get("security_scan") or {}).get("total_issues", 0) for r in legacy
+        )
 
     stats = {
         "total_students": len(students),
         "total_faculty": len(faculty),
-        "total_repos": len(dept_repos),
-        "analyzed_repos": len([r for r in dept_repos if r.get("status") == "completed"]),
-        "total_security_issues": sum(
-            r.get("security_scan", {}).get("total_issues", 0) for r in dept_repos
-        ),
+        "total_repos": total_repos,
+        "analyzed_repos": analyzed_repos,
+        "total_security_issues": total_issues,
     }
 
     return jsonify(stats), 200
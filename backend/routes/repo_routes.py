@@ -1,16 +1,96 @@
 """Repository management routes."""
 
+import logging
+import time
+from collections import OrderedDict
+
 from flask import Blueprint, request, jsonify
 from middleware.auth_middleware import require_auth, get_current_uid
+from executors import BackgroundExecutor
+
 from services.repo_service import (
-    create_repo_record, clone_github_repo, handle_zip_upload,
+    create_repo_record, clone_github_repo, save_upload_zip, extract_zip,
     list_user_repos, get_repo, delete_repo
 )
-from services.firebase_service import update_document, query_collection, get_user_doc
+from services.firebase_service import (
+    update_document, query_collection, batch_get_users
+)
+import os
 import requests as http_requests
+from requests.adapters import HTTPAdapter, Retry
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - fall back to stdlib json
+    orjson = None
+
+logger = logging.getLogger(__name__)
 
 repo_bp = Blueprint("repos", __name__)
 
+# Clones and ZIP extraction are long network/disk operations; they run on
+# this pool (real OS threads even under gevent) so the request handler
+# returns immediately with 202 and the client polls the repo status,
+# mirroring the background-analysis pool in analysis_routes. (A real task
+# queue would replace this if the app moves past a single backend process.)
+_ingest_pool = BackgroundExecutor(max_workers=2)
+
+
+def _clone_bg(github_url: str, repo_id: str):
+    """Background worker: clone the repo and record the resulting status."""
+    # The executor swallows exceptions, so an unguarded failure would
+    # leave the repo stuck in "cloning" forever (same pattern as
+    # _run_analysis_bg)
+    try:
+        local_path = clone_github_repo(github_url, repo_id)
+        update_document("repositories", repo_id,
+                        {"status": "pending" if local_path else "failed"})
+    except Exception as e:
+        logger.error(f"Clone failed for {repo_id}: {e}")
+        try:
+            update_document("repositories", repo_id, {"status": "failed"})
+        except Exception:
+            pass
+
+
+def _extract_bg(tmp_path: str, repo_id: str):
+    """Background worker: extract a saved upload and record the status."""
+    try:
+        local_path = extract_zip(tmp_path, repo_id)
+        update_document("repositories", repo_id,
+                        {"status": "pending" if local_path else "failed"})
+    except Exception as e:
+        logger.error(f"Extraction failed for {repo_id}: {e}")
+        try:
+            update_document("repositories", repo_id, {"status": "failed"})
+        except Exception:
+            pass
+
+
+# One pooled session for all GitHub calls: keep-alive skips the TCP+TLS
+# handshake on repeat requests, and transient 5xx answers are retried
+# with backoff. A token (optional) lifts the search quota to 5000/hour.
+_gh_session = http_requests.Session()
+_gh_session.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, backoff_factor=0.2,
+                      status_forcelist=[502, 503, 504]),
+))
+_gh_token = os.getenv("GITHUB_TOKEN", "")
+if _gh_token:
+    _gh_session.headers["Authorization"] = f"Bearer {_gh_token}"
+
+# GitHub search cache: popular queries repeat, and each miss costs a slow
+# external API call plus rate-limit quota. Entries are keyed on the
+# normalized query and hold (fetched_at, etag, results); within the TTL
+# hits return instantly, after it the stored ETag is revalidated with
+# If-None-Match so a 304 costs no quota. Same bounded-LRU shape as the
+# chatbot cache in chat_routes.
+_search_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_SEARCH_CACHE_MAX = 256
+_SEARCH_CACHE_TTL = 300  # seconds
+
 
 @repo_bp.route("", methods=["POST"])
 @require_auth
@@ -27,18 +107,16 @@ def create_repository():
         if not github_url:
             return jsonify({"error": "github_url required"}), 400
 
-        repo_id = create_repo_record(uid, name, "github", github_url)
+        # Initial status rides in the create itself — one write, not a
+        # create-then-update pair
+        repo_id = create_repo_record(uid, name, "github", github_url,
+                                     status="cloning")
         if not repo_id:
             return jsonify({"error": "Failed to create repository record"}), 500
 
-        # Clone in foreground (within 2-min timeout)
-        local_path = clone_github_repo(github_url, repo_id)
-        if not local_path:
-            update_document("repositories", repo_id, {"status": "failed"})
-            return jsonify({"error": "Failed to clone repository"}), 500
-
-        update_document("repositories", repo_id, {"status": "pending"})
-        return jsonify({"repo_id": repo_id, "name": name, "status": "pending"}), 201
+        # Clone in the background; clients poll the repo status
+        _ingest_pool.submit(_clone_bg, github_url, repo_id)
+        return jsonify({"repo_id": repo_id, "name": name, "status": "cloning"}), 202
 
     elif source == "upload":
         file = request.files.get("file")
@@ -49,17 +127,19 @@ def create_repository():
         if not file.filename.endswith(".zip"):
             return jsonify({"error": "Only ZIP files supported"}), 400
 
-        repo_id = create_repo_record(uid, name, "upload")
+        repo_id = create_repo_record(uid, name, "upload", status="extracting")
         if not repo_id:
             return jsonify({"error": "Failed to create repository record"}), 500
 
-        local_path = handle_zip_upload(file, repo_id)
-        if not local_path:
+        # The upload stream only exists during the request, so the ZIP is
+        # saved here; extraction happens in the background
+        tmp_path = save_upload_zip(file)
+        if not tmp_path:
             update_document("repositories", repo_id, {"status": "failed"})
-            return jsonify({"error": "Failed to extract ZIP"}), 500
+            return jsonify({"error": "Failed to save ZIP"}), 500
 
-        update_document("repositories", repo_id, {"status": "pending"})
-        return jsonify({"repo_id": repo_id, "name": name, "status": "pending"}), 201
+        _ingest_pool.submit(_extract_bg, tmp_path, repo_id)
+        return jsonify({"repo_id": repo_id, "name": name, "status": "extracting"}), 202
 
     return jsonify({"error": "source must be 'github' or 'upload'"}), 400
 
@@ -71,15 +151,18 @@ def list_repos():
     uid = get_current_uid()
     own_repos = list_user_repos(uid)
 
-    # Also include repos where user is a collaborator
-    all_repos = query_collection("repositories", limit=1000)
-    collab_repos = [r for r in all_repos
-                    if uid in r.get("collaborators", []) and r.get("owner_uid") != uid]
+    # Indexed array_contains query returns just this user's shared repos
+    # instead of shipping the whole collection and filtering in Python
+    collab_repos = query_collection(
+        "repositories",
+        filters=[("collaborators", "array_contains", uid)],
+        limit=200,
+    )
 
     # Merge, avoiding duplicates
     own_ids = {r.get("id") for r in own_repos}
     for cr in collab_repos:
-        if cr.get("id") not in own_ids:
+        if cr.get("owner_uid") != uid and cr.get("id") not in own_ids:
             cr["is_collaborator"] = True
             own_repos.append(cr)
 
@@ -115,14 +198,34 @@ def search_public_repos():
     if not query:
         return jsonify({"error": "Search query (q) required"}), 400
 
+    key = query.lower()
+    now = time.monotonic()
+    entry = _search_cache.get(key)
+    if entry is not None and now - entry[0] <= _SEARCH_CACHE_TTL:
+        _search_cache.move_to_end(key)
+        return jsonify({"results": entry[2]}), 200
+
+    headers = {}
+    if entry is not None and entry[1]:
+        # Expired but revalidatable: a 304 answer is free GitHub quota
+        headers["If-None-Match"] = entry[1]
+
     try:
-        resp = http_requests.get(
+        resp = _gh_session.get(
             "https://api.github.com/search/repositories",
             params={"q": query, "per_page": 10, "sort": "stars"},
+            headers=headers,
             timeout=10,
         )
+        if resp.status_code == 304 and entry is not None:
+            _search_cache[key] = (now, entry[1], entry[2])
+            _search_cache.move_to_end(key)
+            return jsonify({"results": entry[2]}), 200
         if resp.status_code == 200:
-            data = resp.json()
+            # orjson parses GitHub's wide item objects several times
+            # faster than resp.json(); only the five projected fields
+            # survive past this block
+            data = orjson.loads(resp.content) if orjson else resp.json()
             results = [
                 {
                     "name": r["full_name"],
@@ -133,6 +236,10 @@ def search_public_repos():
                 }
                 for r in data.get("items", [])
             ]
+            _search_cache[key] = (now, resp.headers.get("ETag"), results)
+            _search_cache.move_to_end(key)
+            if len(_search_cache) > _SEARCH_CACHE_MAX:
+                _search_cache.popitem(last=False)
             return jsonify({"results": results}), 200
         return jsonify({"error": "GitHub API error"}), 502
     except Exception as e:
@@ -153,10 +260,13 @@ def get_collaborators(repo_id):
     if repo.get("owner_uid") != uid and uid not in repo.get("collaborators", []):
         return jsonify({"error": "Access denied"}), 403
 
+    # One get_all RPC for the whole collaborator list instead of a
+    # serial round trip per member
     collaborator_uids = repo.get("collaborators", [])
+    users_map = batch_get_users(collaborator_uids)
     collaborators = []
     for c_uid in collaborator_uids:
-        user_doc = get_user_doc(c_uid)
+        user_doc = users_map.get(c_uid)
         if user_doc:
             collaborators.append({
                 "uid": c_uid,
@@ -186,13 +296,18 @@ def add_collaborator(repo_id):
     if not email:
         return jsonify({"error": "email is required"}), 400
 
-    # Look up user by email
-    all_users = query_collection("users", limit=5000)
-    target_user = None
-    for u in all_users:
-        if u.get("email", "").lower() == email:
-            target_user = u
-            break
+    # Indexed equality filter on the normalized email field — one doc
+    # read instead of sweeping up to 5000 users per invitation
+    matches = query_collection(
+        "users", filters=[("email_lower", "==", email)], limit=1)
+    target_user = matches[0] if matches else None
+    if target_user is None:
+        # Legacy docs created before email_lower existed: fall back to
+        # the old collection scan
+        for u in query_collection("users", limit=5000):
+            if u.get("email", "").lower() == email:
+                target_user = u
+                break
 
     if not target_user:
         return jsonify({"error": f"No user found with email {email}"}), 404
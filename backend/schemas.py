@@ -0,0 +1,107 @@
+"""Request payload schemas.
+
+Validation for the mutation endpoints lives here instead of per-field
+isinstance chains in the route handlers. With msgspec installed the
+decoding and range checks run in its C decoder; without it, the same
+schemas are enforced by a plain-json fallback so behavior is identical.
+Both paths raise ValueError (msgspec's errors subclass it) with a
+message safe to return to the client.
+"""
+
+import json
+
+try:
+    import msgspec
+    from msgspec import Meta
+    from typing import Annotated
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+
+if msgspec is not None:
+
+    class ScoreStudent(msgspec.Struct):
+        student_uid: str
+        marks: Annotated[float, Meta(ge=0, le=100)]
+        comments: str = ""
+
+    class ScoreFaculty(msgspec.Struct):
+        score: Annotated[float, Meta(ge=0, le=10)]
+        feedback: str = ""
+
+    class AssignMentor(msgspec.Struct):
+        faculty_uid: str
+        student_uid: str
+
+    _score_student_decoder = msgspec.json.Decoder(ScoreStudent)
+    _score_faculty_decoder = msgspec.json.Decoder(ScoreFaculty)
+    _assign_mentor_decoder = msgspec.json.Decoder(AssignMentor)
+
+    def decode_score_student(raw: bytes) -> "ScoreStudent":
+        return _score_student_decoder.decode(raw)
+
+    def decode_score_faculty(raw: bytes) -> "ScoreFaculty":
+        return _score_faculty_decoder.decode(raw)
+
+    def decode_assign_mentor(raw: bytes) -> "AssignMentor":
+        return _assign_mentor_decoder.decode(raw)
+
+else:
+
+    class _Struct:
+        def __init__(self, **kwargs):
+            self.__dict__.update(kwargs)
+
+    class ScoreStudent(_Struct):
+        pass
+
+    class ScoreFaculty(_Struct):
+        pass
+
+    class AssignMentor(_Struct):
+        pass
+
+    def _load(raw):
+        try:
+            data = json.loads(raw or b"{}")
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON: {e}") from e
+        if not isinstance(data, dict):
+            raise ValueError("expected a JSON object")
+        return data
+
+    def _require_str(data, field, default=None):
+        value = data.get(field, default)
+        if not isinstance(value, str):
+            raise ValueError(f"{field} must be a string")
+        return value
+
+    def _require_number(data, field, lo, hi):
+        value = data.get(field)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{field} must be a number")
+        if not lo <= value <= hi:
+            raise ValueError(f"{field} must be between {lo} and {hi}")
+        return float(value)
+
+    def decode_score_student(raw: bytes) -> "ScoreStudent":
+        data = _load(raw)
+        return ScoreStudent(
+            student_uid=_require_str(data, "student_uid"),
+            marks=_require_number(data, "marks", 0, 100),
+            comments=_require_str(data, "comments", default=""),
+        )
+
+    def decode_score_faculty(raw: bytes) -> "ScoreFaculty":
+        data = _load(raw)
+        return ScoreFaculty(
+            score=_require_number(data, "score", 0, 10),
+            feedback=_require_str(data, "feedback", default=""),
+        )
+
+    def decode_assign_mentor(raw: bytes) -> "AssignMentor":
+        data = _load(raw)
+        return AssignMentor(
+            faculty_uid=_require_str(data, "faculty_uid"),
+            student_uid=_require_str(data, "student_uid"),
+        )
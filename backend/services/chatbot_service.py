@@ -9,9 +9,12 @@ Does NOT send entire repository — only structured metadata.
 """
 
 import os
+import re
 import json
 import logging
 import requests
+from executors import BackgroundExecutor
+from requests.adapters import HTTPAdapter
 from typing import Optional
 
 logger = logging.getLogger(__name__)
@@ -19,19 +22,45 @@ logger = logging.getLogger(__name__)
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3")
 
+# One pooled session for all Ollama calls: keep-alive reuses the TCP
+# connection across chat turns instead of paying a fresh handshake per
+# request. Same shape as the GitHub session in repo_routes.
+_ollama_session = requests.Session()
+_ollama_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+_ollama_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+
 def _ollama_available():
     """Check if Ollama server is reachable."""
     try:
-        r = requests.get(f"{OLLAMA_URL}/api/tags", timeout=3)
+        r = _ollama_session.get(f"{OLLAMA_URL}/api/tags", timeout=3)
         return r.status_code == 200
     except Exception:
         return False
 
-OLLAMA_READY = _ollama_available()
-if OLLAMA_READY:
-    logger.info(f"Ollama is available at {OLLAMA_URL} (model: {OLLAMA_MODEL})")
-else:
-    logger.warning("Ollama not reachable. Chatbot will use fallback mode.")
+
+def _probe_ollama():
+    ready = _ollama_available()
+    if ready:
+        logger.info(f"Ollama is available at {OLLAMA_URL} (model: {OLLAMA_MODEL})")
+    else:
+        logger.warning("Ollama not reachable. Chatbot will use fallback mode.")
+    return ready
+
+
+# The reachability probe used to run inline at import time, which (with
+# lazy blueprints) put its 3s timeout on the first chat request. It now
+# runs on a small background pool started at import; _ollama_ready()
+# treats "not known yet" as unavailable so no request ever waits on it.
+_executor = BackgroundExecutor(max_workers=2)
+_probe_future = _executor.submit(_probe_ollama)
+
+
+def _ollama_ready() -> bool:
+    try:
+        return _probe_future.result(timeout=0.05)
+    except Exception:
+        return False
 
 
 # ---------------------------------------------------------------------------
@@ -147,17 +176,47 @@ def _format_folder_structure(r):
     return f"**Folder Structure:**\n```\n{tree_str}\n```"
 
 
+# ---------------------------------------------------------------------------
+# Fused keyword dispatch: one compiled alternation over every trigger
+# phrase (deterministic queries plus the special commands) replaces a
+# substring scan per keyword per message. finditer collects the phrases
+# present in a single pass; chat() then dispatches in priority order.
+# Same fused-pattern idea as the combined secret regex in the scanner.
+# ---------------------------------------------------------------------------
+_COMMAND_KEYWORDS = ("unused files", "dead code", "circular", "depend")
+_DISPATCH_RE = re.compile("|".join(
+    re.escape(k) for k in sorted(
+        tuple(DETERMINISTIC_QUERIES) + _COMMAND_KEYWORDS,
+        key=len, reverse=True)))
+
+
 class ChatbotService:
     """Repository-aware chatbot."""
 
     def __init__(self, analysis_result: dict, repo_name: str = "Project"):
         self.result = analysis_result
         self.repo_name = repo_name
-        self.use_ollama = OLLAMA_READY
+        self.use_ollama = _ollama_ready()
+        self._context_cache = None
+        self._module_index = None
+        # Prime the rendered context off the request thread so the first
+        # LLM turn finds it cached. Racing a concurrent chat turn is
+        # harmless: both compute the same string and the last assignment
+        # wins.
+        if self.use_ollama:
+            _executor.submit(self._build_context)
 
     def _build_context(self) -> str:
-        """Build structured context string from analysis."""
-        return SYSTEM_PROMPT.format(
+        """Build structured context string from analysis.
+
+        The rendered prompt is identical for every turn of a session —
+        the analysis result never changes under an instance (chat_routes
+        builds a fresh service when it does) — so the json.dumps work
+        runs once and later turns return the cached string.
+        """
+        if self._context_cache is not None:
+            return self._context_cache
+        self._context_cache = SYSTEM_PROMPT.format(
             repo_name=self.repo_name,
             frameworks=", ".join(self.result.get("framework", ["Unknown"])),
             architecture=self.result.get("architecture_type", "Unknown"),
@@ -174,22 +233,27 @@ class ChatbotService:
             database_usage=json.dumps(self.result.get("database_usage", []), indent=2),
             folder_structure=json.dumps(self.result.get("folder_structure", {}), indent=2)[:2000],
         )
+        return self._context_cache
 
     def chat(self, user_message: str) -> str:
         """Process user message and return response."""
         msg_lower = user_message.lower().strip()
 
-        # Try deterministic response first
-        for keyword, handler in DETERMINISTIC_QUERIES.items():
-            if keyword in msg_lower:
-                return handler(self.result)
+        # One pass over the message collects every trigger phrase; the
+        # checks below only consult the resulting set
+        hits = {m.group(0) for m in _DISPATCH_RE.finditer(msg_lower)}
+        if hits:
+            # Try deterministic response first
+            for keyword, handler in DETERMINISTIC_QUERIES.items():
+                if keyword in hits:
+                    return handler(self.result)
 
-        # Special commands
-        if "unused files" in msg_lower or "dead code" in msg_lower:
-            return self._find_unused_files()
+            # Special commands
+            if "unused files" in hits or "dead code" in hits:
+                return self._find_unused_files()
 
-        if "circular" in msg_lower and "depend" in msg_lower:
-            return self._detect_circular_deps()
+            if "circular" in hits and "depend" in hits:
+                return self._detect_circular_deps()
 
         # Fall back to LLM
         if self.use_ollama:
@@ -202,7 +266,7 @@ class ChatbotService:
         try:
             context = self._build_context()
             prompt = f"{context}\n\nUser Question: {user_message}"
-            resp = requests.post(
+            resp = _ollama_session.post(
                 f"{OLLAMA_URL}/api/generate",
                 json={"model": OLLAMA_MODEL, "prompt": prompt, "stream": False},
                 timeout=120,
@@ -241,18 +305,36 @@ class ChatbotService:
             f"database usage, folder structure, or specific components."
         )
 
+    def _imports_index(self) -> dict:
+        """Reverse index: module spelling → files it can refer to.
+
+        Every path suffix of each file is registered in both slash and
+        dot form ("a/b/c.py" under "c", "b/c", "a/b/c", "b.c", …), so a
+        dependency string resolves with one dict lookup instead of a
+        substring scan over every file. Built once per instance.
+        """
+        if self._module_index is not None:
+            return self._module_index
+        index = {}
+        for f in self.result.get("files", []):
+            parts = f.rsplit(".", 1)[0].split("/")
+            for i in range(len(parts)):
+                suffix = "/".join(parts[i:])
+                index.setdefault(suffix, set()).add(f)
+                index.setdefault(suffix.replace("/", "."), set()).add(f)
+        self._module_index = index
+        return index
+
     def _find_unused_files(self) -> str:
         """Find files not imported by any other file."""
         dep_graph = self.result.get("dependency_graph", {})
-        all_files = set(self.result.get("files", []))
+        index = self._imports_index()
         imported_files = set()
 
         for deps in dep_graph.values():
             for dep in deps:
-                # Approximate: check if any file matches the dep
-                for f in all_files:
-                    if dep.replace(".", "/") in f or dep in f:
-                        imported_files.add(f)
+                imported_files.update(index.get(dep, ()))
+                imported_files.update(index.get(dep.replace(".", "/"), ()))
 
         # Files that import things but are never imported
         source_files = set(dep_graph.keys())
@@ -270,32 +352,68 @@ class ChatbotService:
     def _detect_circular_deps(self) -> str:
         """Detect circular dependencies in import graph."""
         dep_graph = self.result.get("dependency_graph", {})
-        cycles = []
+        index = self._imports_index()
+        tracked = set(dep_graph)
 
-        # Simple DFS cycle detection
-        visited = set()
-        rec_stack = set()
-
-        def dfs(node, path):
-            visited.add(node)
-            rec_stack.add(node)
-
-            for dep in dep_graph.get(node, []):
-                # Find if dep matches any file
-                matching = [f for f in dep_graph.keys()
-                          if dep.replace(".", "/") in f or dep in f]
-                for m in matching:
-                    if m in rec_stack:
-                        cycle = path[path.index(m):] + [m] if m in path else [node, m]
-                        cycles.append(cycle)
-                    elif m not in visited:
-                        dfs(m, path + [m])
-
-            rec_stack.discard(node)
-
-        for node in dep_graph:
-            if node not in visited:
-                dfs(node, [node])
+        # Adjacency over tracked files, resolved through the module
+        # index — O(V+E) to build instead of a file scan per edge
+        adj = {}
+        cycles = []
+        for node, deps in dep_graph.items():
+            targets = set()
+            for dep in deps:
+                targets.update(index.get(dep, ()))
+                targets.update(index.get(dep.replace(".", "/"), ()))
+            if node in targets:
+                cycles.append([node, node])
+            adj[node] = [t for t in targets & tracked if t != node]
+
+        # Iterative Tarjan's SCC (explicit work stack, so deep graphs
+        # can't blow the recursion limit); any component with more than
+        # one member contains at least one cycle
+        order = {}
+        lowlink = {}
+        on_stack = set()
+        scc_stack = []
+        counter = 0
+        for root in adj:
+            if root in order:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, edge_i = work[-1]
+                if edge_i == 0:
+                    order[node] = lowlink[node] = counter
+                    counter += 1
+                    scc_stack.append(node)
+                    on_stack.add(node)
+                descended = False
+                neighbors = adj[node]
+                for i in range(edge_i, len(neighbors)):
+                    w = neighbors[i]
+                    if w not in order:
+                        work[-1] = (node, i + 1)
+                        work.append((w, 0))
+                        descended = True
+                        break
+                    if w in on_stack:
+                        lowlink[node] = min(lowlink[node], order[w])
+                if descended:
+                    continue
+                if lowlink[node] == order[node]:
+                    scc = []
+                    while True:
+                        w = scc_stack.pop()
+                        on_stack.discard(w)
+                        scc.append(w)
+                        if w == node:
+                            break
+                    if len(scc) > 1:
+                        cycles.append(scc[::-1] + [scc[-1]])
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
 
         if not cycles:
             return "No circular dependencies detected in the import graph."
@@ -2,13 +2,26 @@
 
 import firebase_admin
 from firebase_admin import credentials, firestore, auth as firebase_auth
+import atexit
 import logging
 import os
+import queue
+import time
+import threading
+from collections import OrderedDict
 
 logger = logging.getLogger(__name__)
 
 db = None
 
+# User documents are fetched repeatedly for the same UIDs (auth middleware,
+# enrichment loops), so hot lookups are served from a short-TTL LRU cache
+# instead of a Firestore round trip. Writes go through invalidate_user.
+_user_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_user_cache_lock = threading.RLock()
+_USER_CACHE_MAX = 1024
+_USER_CACHE_TTL = 60  # seconds
+
 
 def init_firebase(app):
     """Initialize Firebase Admin SDK."""
@@ -58,16 +71,55 @@ def verify_firebase_token(id_token):
 
 
 def get_user_doc(uid):
-    """Get user document from Firestore."""
+    """Get user document from Firestore (cached for a short window)."""
+    now = time.monotonic()
+    with _user_cache_lock:
+        entry = _user_cache.get(uid)
+        if entry is not None and now - entry[0] <= _USER_CACHE_TTL:
+            _user_cache.move_to_end(uid)
+            return entry[1]
+
     db = get_db()
     if not db:
         return None
     doc = db.collection("users").document(uid).get()
+    data = None
     if doc.exists:
         data = doc.to_dict()
         data["uid"] = uid
-        return data
-    return None
+    # Misses are cached too — repeated lookups of unknown UIDs are as
+    # common as hits in the enrichment loops
+    with _user_cache_lock:
+        _user_cache[uid] = (now, data)
+        _user_cache.move_to_end(uid)
+        if len(_user_cache) > _USER_CACHE_MAX:
+            _user_cache.popitem(last=False)
+    return data
+
+
+def invalidate_user(uid):
+    """Drop a user from the lookup cache after their document changes."""
+    with _user_cache_lock:
+        _user_cache.pop(uid, None)
+
+
+def batch_get_users(uids):
+    """Fetch many user documents in one batched read.
+
+    Returns {uid: user_doc}; UIDs with no document are omitted. One
+    get_all round trip replaces a get() per user.
+    """
+    db = get_db()
+    if not db or not uids:
+        return {}
+    refs = [db.collection("users").document(u) for u in uids]
+    users = {}
+    for doc in db.get_all(refs):
+        if doc.exists:
+            data = doc.to_dict()
+            data["uid"] = doc.id
+            users[doc.id] = data
+    return users
 
 
 def create_user_doc(uid, data):
@@ -79,6 +131,7 @@ def create_user_doc(uid, data):
     data["created_at"] = datetime.utcnow()
     data["updated_at"] = datetime.utcnow()
     db.collection("users").document(uid).set(data)
+    invalidate_user(uid)
     return True
 
 
@@ -90,6 +143,7 @@ def update_user_doc(uid, data):
     from datetime import datetime
     data["updated_at"] = datetime.utcnow()
     db.collection("users").document(uid).update(data)
+    invalidate_user(uid)
     return True
 
 
@@ -104,12 +158,16 @@ def add_document(collection, data):
     return doc_ref.id
 
 
-def get_document(collection, doc_id):
-    """Get single document."""
+def get_document(collection, doc_id, fields=None):
+    """Get single document.
+
+    fields, when given, is a list of field paths to fetch — the server
+    sends just those fields instead of the whole document.
+    """
     db = get_db()
     if not db:
         return None
-    doc = db.collection(collection).document(doc_id).get()
+    doc = db.collection(collection).document(doc_id).get(field_paths=fields)
     if doc.exists:
         data = doc.to_dict()
         data["id"] = doc.id
@@ -125,6 +183,65 @@ def update_document(collection, doc_id, data):
     from datetime import datetime
     data["updated_at"] = datetime.utcnow()
     db.collection(collection).document(doc_id).update(data)
+    if collection == "users":
+        # e.g. mentor assignment writes users through the generic helper
+        invalidate_user(doc_id)
+    return True
+
+
+def field_path(*parts):
+    """Build an escaped update key for a nested map entry.
+
+    String keys in update() are parsed as dotted paths whose components
+    must look like identifiers — but Firebase UIDs can start with a
+    digit and legacy map entries can be emails, both of which make the
+    parser raise. FieldPath escapes each component, so any key is safe.
+    """
+    from google.cloud.firestore_v1.field_path import FieldPath
+    return FieldPath(*parts)
+
+
+def array_union(collection, doc_id, field, values):
+    """Atomically append values to an array field.
+
+    The merge happens server-side, so callers skip the read-modify-write
+    cycle and concurrent appends cannot lose each other's updates.
+    """
+    return array_union_many(collection, doc_id, {field: values})
+
+
+def array_union_many(collection, doc_id, field_values):
+    """Atomically append to several array fields in one write.
+
+    ``field_values`` maps field name to the list of values to merge.
+    Same server-side semantics as array_union, but parallel arrays
+    (e.g. a UID list and its denormalized companion) stay in sync
+    without paying a write per field.
+    """
+    db = get_db()
+    if not db:
+        return False
+    from datetime import datetime
+    updates = {f: firestore.ArrayUnion(v) for f, v in field_values.items()}
+    updates["updated_at"] = datetime.utcnow()
+    db.collection(collection).document(doc_id).update(updates)
+    return True
+
+
+def array_remove(collection, doc_id, field, values):
+    """Atomically remove values from an array field.
+
+    Server-side twin of array_union: concurrent appends of other values
+    are preserved, unlike rewriting the whole array.
+    """
+    db = get_db()
+    if not db:
+        return False
+    from datetime import datetime
+    db.collection(collection).document(doc_id).update({
+        field: firestore.ArrayRemove(values),
+        "updated_at": datetime.utcnow(),
+    })
     return True
 
 
@@ -137,8 +254,16 @@ def delete_document(collection, doc_id):
     return True
 
 
-def query_collection(collection, filters=None, order_by=None, limit=50):
-    """Query collection with optional filters."""
+def query_collection(collection, filters=None, order_by=None, limit=50,
+                     start_after=None, fields=None):
+    """Query collection with optional filters.
+
+    start_after is a document ID used as a pagination cursor: results
+    resume after that document, so callers can page through large
+    collections instead of fetching up to the limit every time.
+    fields, when given, projects the query server-side so only those
+    field paths are transferred.
+    """
     db = get_db()
     if not db:
         return []
@@ -146,8 +271,14 @@ def query_collection(collection, filters=None, order_by=None, limit=50):
     if filters:
         for field, op, value in filters:
             ref = ref.where(field, op, value)
+    if fields:
+        ref = ref.select(fields)
     if order_by:
         ref = ref.order_by(order_by)
+    if start_after:
+        snapshot = db.collection(collection).document(start_after).get()
+        if snapshot.exists:
+            ref = ref.start_after(snapshot)
     if limit:
         ref = ref.limit(limit)
     docs = ref.stream()
@@ -159,11 +290,145 @@ def query_collection(collection, filters=None, order_by=None, limit=50):
     return results
 
 
+def commit_batch(ops):
+    """Commit several writes in one atomic round trip.
+
+    ops is an iterable of (op, collection, doc_id, data) tuples with op in
+    {"set", "update", "add"}; doc_id is ignored for "add". Returns the list
+    of written document IDs (in op order), or None when Firestore is down.
+    """
+    db = get_db()
+    if not db:
+        return None
+    from datetime import datetime
+    now = datetime.utcnow()
+    batch = db.batch()
+    ids = []
+    for op, collection, doc_id, data in ops:
+        if op == "add":
+            ref = db.collection(collection).document()
+            batch.set(ref, {**data, "created_at": now, "updated_at": now})
+        elif op == "set":
+            ref = db.collection(collection).document(doc_id)
+            batch.set(ref, {**data, "created_at": now, "updated_at": now})
+        else:
+            ref = db.collection(collection).document(doc_id)
+            batch.update(ref, {**data, "updated_at": now})
+        if collection == "users":
+            invalidate_user(ref.id)
+        ids.append(ref.id)
+    batch.commit()
+    return ids
+
+
+def aggregate_count(collection, filters=None):
+    """Server-side count over a (filtered) collection.
+
+    Returns the count as an int, or None when the SDK/backend does not
+    support aggregation queries so callers can fall back to counting
+    fetched documents.
+    """
+    db = get_db()
+    if not db:
+        return None
+    try:
+        ref = db.collection(collection)
+        if filters:
+            for field, op, value in filters:
+                ref = ref.where(field, op, value)
+        result = ref.count().get()
+        return int(result[0][0].value)
+    except Exception as e:
+        logger.warning(f"Aggregation count failed for {collection}: {e}")
+        return None
+
+
+def aggregate_sum(collection, field, filters=None):
+    """Server-side sum of a numeric field over a (filtered) collection.
+
+    Returns the sum, or None when aggregation is unavailable.
+    """
+    db = get_db()
+    if not db:
+        return None
+    try:
+        ref = db.collection(collection)
+        if filters:
+            for f, op, value in filters:
+                ref = ref.where(f, op, value)
+        result = ref.sum(field).get()
+        return result[0][0].value
+    except Exception as e:
+        logger.warning(f"Aggregation sum failed for {collection}.{field}: {e}")
+        return None
+
+
+# Analytics events are fire-and-forget: handlers enqueue them and a daemon
+# thread batch-commits the queue every half second, so the write never sits
+# on the request path and bursts coalesce into one batch.
+_analytics_queue: "queue.Queue" = queue.Queue()
+_analytics_lock = threading.Lock()
+_analytics_thread = None
+_ANALYTICS_FLUSH_INTERVAL = 0.5  # seconds
+_ANALYTICS_BATCH_MAX = 400       # stay under Firestore's 500-op batch cap
+
+
+def _flush_analytics(wait_timeout):
+    """Drain up to one batch of queued events and commit them together."""
+    events = []
+    try:
+        events.append(_analytics_queue.get(timeout=wait_timeout))
+        while len(events) < _ANALYTICS_BATCH_MAX:
+            events.append(_analytics_queue.get_nowait())
+    except queue.Empty:
+        pass
+    if not events:
+        return
+    db = get_db()
+    if not db:
+        return
+    try:
+        batch = db.batch()
+        for data in events:
+            batch.set(db.collection("analytics").document(), data)
+        batch.commit()
+    except Exception as e:
+        logger.error(f"Failed to flush {len(events)} analytics events: {e}")
+
+
+def _analytics_worker():
+    while True:
+        _flush_analytics(_ANALYTICS_FLUSH_INTERVAL)
+
+
+def _drain_analytics():
+    """Flush whatever is still queued (called at interpreter exit)."""
+    while not _analytics_queue.empty():
+        _flush_analytics(0)
+
+
+def _ensure_analytics_worker():
+    global _analytics_thread
+    if _analytics_thread is not None:
+        return
+    with _analytics_lock:
+        if _analytics_thread is None:
+            _analytics_thread = threading.Thread(
+                target=_analytics_worker, name="analytics-flush", daemon=True)
+            _analytics_thread.start()
+            atexit.register(_drain_analytics)
+
+
 def log_analytics_event(event_type, user_uid, repo_id=None, metadata=None):
-    """Log an analytics event."""
-    add_document("analytics", {
+    """Queue an analytics event for background batch writing."""
+    from datetime import datetime
+    _ensure_analytics_worker()
+    now = datetime.utcnow()
+    _analytics_queue.put({
         "event_type": event_type,
         "user_uid": user_uid,
         "repo_id": repo_id,
         "metadata": metadata or {},
+        "created_at": now,
+        "updated_at": now,
     })
@@ -12,7 +12,7 @@ import subprocess
 from typing import Optional
 from services.firebase_service import (
     add_document, get_document, update_document,
-    delete_document, query_collection, log_analytics_event
+    delete_document, query_collection, log_analytics_event, get_user_doc
 )
 
 logger = logging.getLogger(__name__)
@@ -26,14 +26,23 @@ def get_upload_dir():
 
 
 def create_repo_record(owner_uid: str, name: str, source: str,
-                       github_url: Optional[str] = None) -> Optional[str]:
-    """Create a repository record in Firestore."""
+                       github_url: Optional[str] = None,
+                       status: str = "pending") -> Optional[str]:
+    """Create a repository record in Firestore.
+
+    Callers that know the first status (e.g. "cloning") pass it here so
+    the record lands in one write instead of a create-then-update pair.
+    """
+    # Denormalize the owner's department so department-scoped repo queries
+    # can filter server-side without a user lookup
+    owner = get_user_doc(owner_uid)
     data = {
         "owner_uid": owner_uid,
         "name": name,
         "source": source,
         "github_url": github_url,
-        "status": "pending",
+        "department": (owner or {}).get("department", ""),
+        "status": status,
         "analysis_result": None,
         "security_scan": None,
     }
@@ -78,17 +87,27 @@ def clone_github_repo(github_url: str, repo_id: str) -> Optional[str]:
         return None
 
 
-def handle_zip_upload(file_storage, repo_id: str) -> Optional[str]:
-    """Extract uploaded ZIP file. Returns local path or None."""
-    upload_dir = get_upload_dir()
-    dest = os.path.join(upload_dir, repo_id)
+def save_upload_zip(file_storage) -> Optional[str]:
+    """Persist an uploaded ZIP to a temp file.
 
+    Must run inside the request — the upload stream dies with it. The
+    returned path can then be extracted outside the request cycle.
+    """
     try:
-        # Save ZIP to temp
         with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as tmp:
             file_storage.save(tmp.name)
-            tmp_path = tmp.name
+            return tmp.name
+    except Exception as e:
+        logger.error(f"Failed to save uploaded ZIP: {e}")
+        return None
+
+
+def extract_zip(tmp_path: str, repo_id: str) -> Optional[str]:
+    """Extract a saved ZIP into the repo directory. Returns local path or None."""
+    upload_dir = get_upload_dir()
+    dest = os.path.join(upload_dir, repo_id)
 
+    try:
         # Extract
         os.makedirs(dest, exist_ok=True)
         with zipfile.ZipFile(tmp_path, "r") as zf:
@@ -124,6 +143,14 @@ def handle_zip_upload(file_storage, repo_id: str) -> Optional[str]:
         return None
 
 
+def handle_zip_upload(file_storage, repo_id: str) -> Optional[str]:
+    """Save and extract an uploaded ZIP synchronously (legacy path)."""
+    tmp_path = save_upload_zip(file_storage)
+    if not tmp_path:
+        return None
+    return extract_zip(tmp_path, repo_id)
+
+
 def get_repo_path(repo_id: str) -> Optional[str]:
     """Get local path for a repository."""
     upload_dir = get_upload_dir()
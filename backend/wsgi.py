@@ -0,0 +1,24 @@
+"""WSGI entrypoint for gunicorn.
+
+gevent's monkey-patch must run before anything imports socket/ssl (and
+therefore before requests or the Firebase SDK), so this module patches
+first and only then imports the app factory.
+"""
+
+from gevent import monkey
+
+monkey.patch_all()
+
+# grpc's C core does not cooperate with gevent's event loop by default;
+# init_gevent() swaps in gevent-aware I/O before the Firestore channel
+# exists. Firebase init is deferred to the first request, but doing this
+# here guarantees the ordering regardless.
+try:
+    import grpc.experimental.gevent as grpc_gevent
+    grpc_gevent.init_gevent()
+except ImportError:  # pragma: no cover - grpc built without gevent support
+    pass
+
+from app import create_app
+
+app = create_app()
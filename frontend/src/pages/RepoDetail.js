@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, Link, useNavigate } from 'react-router-dom';
 import Navbar from '../components/Navbar';
-import { getRepo, startAnalysis, deleteRepo } from '../services/api';
+import { getRepo, startAnalysis, getAnalysisStatus, deleteRepo } from '../services/api';
 import toast from 'react-hot-toast';
 
 export default function RepoDetail() {
@@ -28,9 +28,22 @@ export default function RepoDetail() {
   const handleAnalyze = async () => {
     setAnalyzing(true);
     try {
-      const res = await startAnalysis(repoId);
-      setRepo({ ...repo, status: 'completed', analysis_result: res.data.analysis });
-      toast.success('Analysis complete!');
+      // Analysis runs in the background (202); poll until it settles
+      await startAnalysis(repoId);
+      let status = 'analyzing';
+      for (let i = 0; i < 200 && status === 'analyzing'; i++) {
+        await new Promise((resolve) => setTimeout(resolve, 3000));
+        const res = await getAnalysisStatus(repoId);
+        status = res.data.status;
+      }
+      if (status === 'completed') {
+        await loadRepo();
+        toast.success('Analysis complete!');
+      } else if (status === 'analyzing') {
+        toast.error('Analysis is taking longer than expected — check back soon');
+      } else {
+        toast.error('Analysis failed');
+      }
     } catch (err) {
       toast.error(err.response?.data?.error || 'Analysis failed');
     }